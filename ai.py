@@ -0,0 +1,116 @@
+# Ocena ruchów AI bez Qt — wszystkie pary (źródło, cel) naraz jako macierze NumPy.
+# Wspólna dla ruchów przeciwnika (GameView.enemy_ai_turn) i podpowiedzi (GameView.show_ai_hint).
+import numpy as np
+
+# Wagi przeciwnika komputerowego
+ENEMY_AI_WEIGHTS = {
+    "attack_diff": 10,  # przewaga jednostek przy ataku
+    "attack_distance": 0.2,  # bliżej lepiej
+    "plus_bonus": 20,  # bonus za zaatakowanie węzła typu plus
+    "risk_margin": 3,  # za mało jednostek po ataku...
+    "risk_penalty": 30,  # ...to kara za ryzykowny atak
+    "ally_radius": 150,
+    "ally_bonus": 0,  # premia za każdego swojego blisko celu ataku
+    "support_diff": 0,
+    "support_target": -5,  # im mniej jednostek w celu, tym większy priorytet wsparcia
+    "support_distance": 0.1,
+    "threat_radius": 200,
+    "threat_max_units": float("inf"),
+    "threat_bonus": 15,  # wróg blisko wspieranego węzła
+    "dominance_bonus": 0,
+}
+
+# Wagi podpowiedzi dla gracza
+HINT_WEIGHTS = {
+    "attack_diff": 10,
+    "attack_distance": 0.2,
+    "plus_bonus": 20,
+    "risk_margin": 3,
+    "risk_penalty": 0,
+    "ally_radius": 150,
+    "ally_bonus": 5,
+    "support_diff": 3,
+    "support_target": 0,
+    "support_distance": 0.1,
+    "threat_radius": 200,
+    "threat_max_units": 6,
+    "threat_bonus": 15,
+    "dominance_bonus": 10,  # atak przy dużej przewadze, wsparcie gdy przegrywamy
+}
+
+
+class BoardSnapshot:
+    # Niezmienna kopia stanu węzłów — można ją bezpiecznie oceniać w innym wątku lub procesie
+    def __init__(self, simulation):
+        nodes = simulation.nodes
+        self.units = np.array([node.unit_count for node in nodes], dtype=np.float64)
+        self.colors = np.array([node.color_name for node in nodes], dtype=object)
+        self.free = np.array([node.can_connect() for node in nodes], dtype=bool)
+        self.is_plus = np.array([node.node_type == "plus" for node in nodes], dtype=bool)
+        self.distance = simulation.distances()
+        for array in (self.units, self.colors, self.free, self.is_plus, self.distance):
+            array.setflags(write=False)
+
+    def __len__(self):
+        return len(self.units)
+
+
+def score_moves(snapshot, color, enemy_color, weights):
+    # Macierz N x N: scores[i, j] to ocena połączenia węzła i -> j, -inf gdy ruch niedozwolony
+    n = len(snapshot)
+    if n == 0:
+        return np.zeros((0, 0))
+
+    units = snapshot.units
+    is_own = snapshot.colors == color
+    is_enemy = snapshot.colors == enemy_color
+    free = snapshot.free
+    is_plus = snapshot.is_plus
+    distance = snapshot.distance
+
+    diff = units[:, None] - units[None, :]
+    valid = (is_own & free & (units >= 2))[:, None] & free[None, :] & (diff > 0)
+    np.fill_diagonal(valid, False)
+
+    dominance = int(is_own.sum()) - int(is_enemy.sum())
+    allies_near = (distance[:, is_own] < weights["ally_radius"]).sum(axis=1)
+    enemies_near = (distance[:, is_enemy] < weights["threat_radius"]).any(axis=1)
+    threatened = enemies_near & (units < weights["threat_max_units"])
+
+    attack = (diff * weights["attack_diff"]
+              - distance * weights["attack_distance"]
+              + (is_plus * weights["plus_bonus"])[None, :]
+              - (diff < weights["risk_margin"]) * weights["risk_penalty"]
+              + (allies_near * weights["ally_bonus"])[None, :])
+    support = (diff * weights["support_diff"]
+               + units[None, :] * weights["support_target"]
+               - distance * weights["support_distance"]
+               + (threatened * weights["threat_bonus"])[None, :])
+    if dominance > 2:
+        attack += weights["dominance_bonus"]
+    if dominance < 0:
+        support += weights["dominance_bonus"]
+
+    scores = np.where(is_enemy[None, :], attack, np.where(is_own[None, :], support, -np.inf))
+    scores[~valid] = -np.inf
+    return scores
+
+
+def top_moves(snapshot, color, enemy_color, weights, k=1):
+    # Najlepsze k ruchów jako lista (ocena, id źródła, id celu); przy remisie wygrywa wcześniejsza para
+    scores = score_moves(snapshot, color, enemy_color, weights)
+    if scores.size == 0:
+        return []
+    flat = scores.ravel()
+    order = np.argsort(-flat, kind="stable")[:k]
+    n = len(snapshot)
+    return [(float(flat[i]), int(i // n), int(i % n)) for i in order if np.isfinite(flat[i])]
+
+
+def best_move(snapshot, color, enemy_color, weights):
+    # (id źródła, id celu) albo None; funkcja modułu, więc nadaje się też do puli procesów
+    moves = top_moves(snapshot, color, enemy_color, weights, k=1)
+    if not moves:
+        return None
+    _, source_id, target_id = moves[0]
+    return source_id, target_id
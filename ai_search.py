@@ -0,0 +1,131 @@
+# AI z przeszukiwaniem (Monte Carlo z UCB1) na szybkich kopiach engine.Simulation — bez Qt.
+# Kandydaci to najlepsze ruchy heurystyki z ai.py; każdy jest oceniany symulacją kilku sekund gry naprzód.
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ai
+
+ROLLOUT_HORIZON = 12.0  # ile sekund gry symulujemy po ruchu
+ROLLOUT_STEP = 0.25  # krok symulacji w rolloutach (grubszy niż klatka, wystarcza do oceny)
+DECISION_INTERVAL = 2.0  # co ile sekund gry obie strony wykonują ruch w rolloucie (jak ai_timer)
+CANDIDATES = 6  # ilu najlepszych kandydatów heurystyki rozważamy
+EXPLORATION = 1.4  # stała UCB1
+
+
+def candidate_moves(simulation, color, enemy_color, weights, k=CANDIDATES):
+    snapshot = ai.BoardSnapshot(simulation)
+    moves = [(source, target) for _, source, target in ai.top_moves(snapshot, color, enemy_color, weights, k=k)]
+    return moves + [None]  # czekanie też jest ruchem
+
+
+def apply_move(simulation, move):
+    if move is None:
+        return
+    source, target = simulation.nodes[move[0]], simulation.nodes[move[1]]
+    if source.can_connect() and target.can_connect():
+        simulation.connect(source, target)
+
+
+def rollout_policy(simulation, color, enemy_color, weights, rng):
+    # Losowy ruch spośród trzech najlepszych wg heurystyki — szybki i niezbyt przewidywalny
+    moves = ai.top_moves(ai.BoardSnapshot(simulation), color, enemy_color, weights, k=3)
+    if not moves:
+        return None
+    _, source, target = rng.choice(moves)
+    return source, target
+
+
+def evaluate(simulation, color):
+    # Wynik w [0, 1]: 1 — wygrana, 0 — przegrana, pomiędzy wg przewagi jednostek i węzłów
+    own = [n for n in simulation.nodes if n.color_name == color]
+    enemy = [n for n in simulation.nodes if n.color_name != color]
+    if not enemy:
+        return 1.0
+    if not own:
+        return 0.0
+    balance = (sum(n.unit_count for n in own) + 10 * len(own)) - (sum(n.unit_count for n in enemy) + 10 * len(enemy))
+    return 0.5 + 0.5 * math.tanh(balance / 50)
+
+
+def rollout(simulation, move, color, enemy_color, weights, rng, horizon=ROLLOUT_HORIZON):
+    simulation = simulation.copy()
+    apply_move(simulation, move)
+    elapsed = 0.0
+    next_decision = DECISION_INTERVAL
+    while elapsed < horizon:
+        simulation.step(ROLLOUT_STEP)
+        elapsed += ROLLOUT_STEP
+        if simulation.winner():
+            break
+        if elapsed >= next_decision:
+            next_decision += DECISION_INTERVAL
+            apply_move(simulation, rollout_policy(simulation, enemy_color, color, weights, rng))
+            apply_move(simulation, rollout_policy(simulation, color, enemy_color, weights, rng))
+    return evaluate(simulation, color)
+
+
+def run_rollouts(simulation, candidates, color, enemy_color, weights, time_budget, seed, horizon=ROLLOUT_HORIZON):
+    # Pętla UCB1 do wyczerpania budżetu czasu; zwraca (liczba odwiedzin, suma wyników) dla każdego kandydata
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget
+    visits = [0] * len(candidates)
+    totals = [0.0] * len(candidates)
+    total_visits = 0
+
+    while time.perf_counter() < deadline:
+        if total_visits < len(candidates):
+            i = total_visits  # każdy kandydat najpierw raz
+        else:
+            log_total = math.log(total_visits)
+            i = max(range(len(candidates)),
+                    key=lambda c: totals[c] / visits[c] + EXPLORATION * math.sqrt(log_total / visits[c]))
+        totals[i] += rollout(simulation, candidates[i], color, enemy_color, weights, rng, horizon)
+        visits[i] += 1
+        total_visits += 1
+
+    return visits, totals
+
+
+class MonteCarloSearch:
+    # Wywoływalny obiekt dla AIWorker.request_move(search=...); rollouty równolegle na wszystkich rdzeniach
+    def __init__(self, time_budget=1.0, workers=None, horizon=ROLLOUT_HORIZON, seed=None):
+        self.time_budget = time_budget
+        self.workers = workers or os.cpu_count() or 1
+        self.horizon = horizon
+        self.rng = random.Random(seed)
+        self.pool = None
+
+    def __call__(self, simulation, color, enemy_color, weights):
+        candidates = candidate_moves(simulation, color, enemy_color, weights)
+        if len(candidates) == 1:
+            return None  # tylko czekanie
+
+        seeds = [self.rng.randrange(2 ** 32) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [run_rollouts(simulation, candidates, color, enemy_color, weights,
+                                    self.time_budget, seeds[0], self.horizon)]
+        else:
+            if self.pool is None:
+                # "spawn", bo fork procesu z wątkami Qt nie jest bezpieczny
+                self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            futures = [
+                self.pool.submit(run_rollouts, simulation, candidates, color, enemy_color, weights,
+                                 self.time_budget, seed, self.horizon)
+                for seed in seeds
+            ]
+            results = [future.result() for future in futures]
+
+        visits = [sum(r[0][i] for r in results) for i in range(len(candidates))]
+        totals = [sum(r[1][i] for r in results) for i in range(len(candidates))]
+        # Najczęściej odwiedzany kandydat (przy remisie — lepsza średnia)
+        best = max(range(len(candidates)), key=lambda i: (visits[i], totals[i] / max(visits[i], 1)))
+        return candidates[best]
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import ai
+
+
+class AIWorker(QObject):
+    # Liczy ruch AI poza wątkiem GUI; wynik wraca sygnałem (połączenie kolejkowane do wątku GUI)
+    move_ready = pyqtSignal(object)  # (id źródła, id celu) albo None
+
+    def __init__(self, use_processes=False, parent=None):
+        super().__init__(parent)
+        # Pula procesów dla cięższego przeszukiwania, wątek wystarcza dla oceny NumPy
+        self.executor = ProcessPoolExecutor(max_workers=1) if use_processes else ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+
+    def is_busy(self):
+        return self.pending is not None and not self.pending.done()
+
+    def request_move(self, snapshot, color, enemy_color, weights, search=ai.best_move):
+        if self.is_busy():
+            return False  # poprzednia decyzja jeszcze się liczy
+        self.pending = self.executor.submit(search, snapshot, color, enemy_color, weights)
+        self.pending.add_done_callback(self._on_done)
+        return True
+
+    def _on_done(self, future):
+        if future.cancelled():
+            return
+        try:
+            move = future.result()
+        except Exception as e:
+            print(f"[AI] Błąd obliczania ruchu: {e}")
+            return
+        try:
+            self.move_ready.emit(move)
+        except RuntimeError:
+            pass  # obiekt Qt już usunięty (gra zakończona)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,26 +1,20 @@
-import socket
-conn = None
+import asyncio
 
-def connect_to_server(ip: str, port: int = 12345):
-    global conn
-    conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    conn.connect((ip, port))
-    print(f"[CLIENT] Połączono z serwerem {ip}:{port}")
-def send_test_message():
-    send_data("HELLO_FROM_CLIENT")
-
-def send_data(data: str):
-    global conn
-    if conn:
-        conn.sendall(data.encode())
-    else:
-        print("[ERROR] Próba wysłania danych bez połączenia!")
-
-def receive_data() -> str:
-    global conn
-    if conn:
-        return conn.recv(1024).decode()
-    else:
-        print("[ERROR] Próba odebrania danych bez połączenia!")
-        return ""
+from protocol import FramedProtocol
 
+async def connect_to_server(handler, ip: str, port: int = 12345, timeout=5.0, retries=3, retry_delay=1.0):
+    # Próbuje połączyć się kilka razy, każda próba z limitem czasu
+    loop = asyncio.get_running_loop()
+    last_error = None
+    for attempt in range(1, retries + 1):
+        try:
+            _, protocol = await asyncio.wait_for(
+                loop.create_connection(lambda: FramedProtocol(handler), ip, port), timeout)
+            print(f"[CLIENT] Połączono z serwerem {ip}:{port}")
+            return protocol
+        except (OSError, asyncio.TimeoutError) as e:
+            last_error = e
+            print(f"[CLIENT] Próba {attempt}/{retries} nieudana: {e}")
+            if attempt < retries:
+                await asyncio.sleep(retry_delay)
+    raise ConnectionError(f"Nie udało się połączyć z {ip}:{port}: {last_error}")
@@ -0,0 +1,309 @@
+# Dedykowany serwer bez Qt: wiele pokoi (meczów 1v1) na jednym porcie.
+# Proces główny przyjmuje graczy i łączy ich w pary, pokoje działają w procesach roboczych
+# (gniazda graczy są przekazywane do procesu roboczego, który symuluje mecz i przekazuje ruchy).
+#
+#   python dedicated_server.py --port 12345 --workers 4
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import socket
+from multiprocessing.reduction import send_handle, recv_handle
+
+from engine import Simulation
+from levels import LEVELS
+from protocol import FramedProtocol
+import wire
+from server import start_server, PORT
+from state_sync import SnapshotSender
+
+TICK_RATE = 20  # kroków symulacji na sekundę w każdym pokoju
+ROUND_TIME = 120  # s — jak odliczanie rundy w GameView; potem mecz kończy się bez zwycięzcy
+PLAYER_COLORS = wire.COLORS
+
+
+class Room:
+    # Jeden mecz: autorytatywna symulacja + przekazywanie ruchów między dwoma graczami
+    def __init__(self, room_id, level_name, on_closed=None):
+        self.room_id = room_id
+        self.level_name = level_name
+        self.simulation = Simulation.from_level(LEVELS[level_name])
+        self.players = {}  # FramedProtocol -> kolor
+        self.snapshots = {}  # FramedProtocol -> SnapshotSender (każdy gracz potwierdza osobno)
+        self.on_closed = on_closed
+        self.task = None
+        self.closed = False
+
+    def on_connected(self, peer):
+        self.players[peer] = PLAYER_COLORS[len(self.players)]
+        self.snapshots[peer] = SnapshotSender()
+        if len(self.players) == len(PLAYER_COLORS):
+            self.start()
+
+    def start(self):
+        for peer, color in self.players.items():
+            peer.send(wire.encode_matched(self.room_id, color, self.level_name))
+        self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while not self.closed:
+            await asyncio.sleep(1 / TICK_RATE)
+            now = loop.time()
+            self.simulation.step(now - last)
+            last = now
+            for peer, sender in self.snapshots.items():
+                message = sender.encode(self.simulation)
+                if message is not None:
+                    peer.send(message)
+            winner = self.simulation.winner()
+            if winner or self.simulation.time >= ROUND_TIME:
+                self.broadcast(wire.encode_game_over(winner))
+                self.close()
+
+    def broadcast(self, data, exclude=None):
+        for peer in self.players:
+            if peer is not exclude:
+                peer.send(data)
+
+    def on_message(self, peer, message):
+        try:
+            move = wire.decode(message)
+        except ValueError:
+            print(f"[ROOM {self.room_id}] Niepoprawna wiadomość od {peer.address}")
+            return
+
+        if move["action"] == "snapshot_ack":
+            self.snapshots[peer].acknowledge(move["seq"])
+        elif move["action"] == "hello":
+            # Nowa gra klienta na tym samym połączeniu zaczyna się od HELLO — odpowiadamy jak lobby
+            if move["version"] != wire.PROTOCOL_VERSION:
+                peer.send(wire.encode_error(f"Nieobsługiwana wersja protokołu: {move['version']}"))
+                peer.close()
+                return
+            peer.send(wire.encode_hello())
+        elif move["action"] == "join":
+            # Gracz szuka nowego meczu, zanim ten się skończył — wychodzi z pokoju. Po zamknięciu
+            # połączenia klient łączy się ponownie i wysyła JOIN już do lobby
+            self.on_disconnected(peer)
+            peer.close()
+        elif move["action"] == "connect":
+            # Poprawne ruchy trafiają bez zmian tylko do graczy tego pokoju
+            if self.apply_move(self.players.get(peer), move):
+                self.broadcast(message, exclude=peer)
+
+    def apply_move(self, color, move):
+        nodes = self.simulation.nodes
+        if move["from"] >= len(nodes) or move["to"] >= len(nodes) or move["from"] == move["to"]:
+            return False
+        source, target = nodes[move["from"]], nodes[move["to"]]
+        if source.color_name != color or not source.can_connect() or not target.can_connect():
+            return False
+        self.simulation.connect(source, target)
+        return True
+
+    def on_disconnected(self, peer):
+        if self.closed:
+            return
+        self.players.pop(peer, None)
+        self.broadcast(wire.encode_opponent_left())
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for peer in list(self.players):
+            peer.close()
+        if self.on_closed:
+            self.on_closed(self.room_id)
+
+
+async def worker_main(pipe):
+    # Proces roboczy: dostaje (id pokoju, poziom) i gniazda graczy od procesu głównego;
+    # kończy się na (None, ...) albo gdy proces główny zniknie (EOF na potoku)
+    loop = asyncio.get_running_loop()
+    rooms = {}
+    stopped = asyncio.Event()
+
+    def on_room_closed(room_id):
+        rooms.pop(room_id, None)
+        try:
+            pipe.send(("closed", room_id))
+        except OSError:
+            stopped.set()
+
+    async def adopt(room, fds, unread):
+        for fd, initial in zip(fds, unread):
+            sock = socket.socket(fileno=fd)
+            sock.setblocking(False)
+            # Bajty, które lobby odebrało już po JOIN, trafiają do pokoju przed nowymi danymi z gniazda
+            await loop.connect_accepted_socket(lambda: FramedProtocol(room, initial), sock=sock)
+
+    def on_pipe_readable():
+        try:
+            room_id, level_name, unread = pipe.recv()
+            if room_id is None:
+                stopped.set()
+                return
+            fds = [recv_handle(pipe) for _ in PLAYER_COLORS]
+        except (EOFError, OSError):
+            stopped.set()
+            return
+        room = Room(room_id, level_name, on_closed=on_room_closed)
+        rooms[room_id] = room
+        asyncio.ensure_future(adopt(room, fds, unread))
+
+    loop.add_reader(pipe.fileno(), on_pipe_readable)
+    await stopped.wait()
+    loop.remove_reader(pipe.fileno())
+    for room in list(rooms.values()):
+        room.close()
+
+
+def run_worker(pipe):
+    # Ctrl+C trafia do całej grupy procesów — proces roboczy kończy się dopiero na polecenie (albo EOF)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(worker_main(pipe))
+
+
+class WorkerHandle:
+    # "spawn": proces roboczy nie dziedziczy gniazd lobby ani końców potoków (swojego i innych procesów),
+    # więc po śmierci procesu głównego widzi EOF zamiast wisieć w nieskończoność
+    context = multiprocessing.get_context("spawn")
+
+    def __init__(self):
+        self.pipe, child_pipe = self.context.Pipe()
+        self.process = self.context.Process(target=run_worker, args=(child_pipe,), daemon=True)
+        self.process.start()
+        child_pipe.close()
+        self.rooms = 0
+
+    def stop(self, timeout=2.0):
+        try:
+            self.pipe.send((None, None, None))
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.pipe.close()
+
+
+class Lobby:
+    # Kojarzenie graczy: pierwszy czekający na dany poziom dostaje kolejnego chętnego
+    def __init__(self, workers):
+        self.workers = workers
+        self.waiting = {}  # poziom -> FramedProtocol
+        self.room_ids = itertools.count(1)
+        self.rooms = {}  # pokoje w tym procesie (gdy brak procesów roboczych)
+
+    def on_connected(self, peer):
+        print(f"[LOBBY] Nowy gracz: {peer.address}")
+
+    def on_message(self, peer, message):
+        try:
+            data = wire.decode(message)
+        except ValueError:
+            return
+        if data["action"] == "hello":
+            if data["version"] != wire.PROTOCOL_VERSION:
+                peer.send(wire.encode_error(f"Nieobsługiwana wersja protokołu: {data['version']}"))
+                peer.close()
+                return
+            peer.send(wire.encode_hello())
+            return
+        if data["action"] != "join":
+            return
+        level_name = data["level"] or "Poziom 1"
+        if level_name not in LEVELS:
+            peer.send(wire.encode_error(f"Nieznany poziom: {level_name}"))
+            return
+
+        # Dalsze bajty czyta już pokój, nie lobby — to, co przyszło razem z JOIN, zostaje w buforze
+        peer.pause()
+        opponent = self.waiting.pop(level_name, None)
+        if opponent is None:
+            self.waiting[level_name] = peer
+        else:
+            self.create_room(level_name, [opponent, peer])
+
+    def on_disconnected(self, peer):
+        for level_name, waiting in list(self.waiting.items()):
+            if waiting is peer:
+                del self.waiting[level_name]
+
+    def create_room(self, level_name, peers):
+        room_id = next(self.room_ids)
+        if not self.workers:
+            room = Room(room_id, level_name, on_closed=lambda rid: self.rooms.pop(rid, None))
+            self.rooms[room_id] = room
+            for peer in peers:
+                peer.handler = room
+                room.on_connected(peer)
+                peer.resume()
+            return
+
+        worker = min(self.workers, key=lambda w: w.rooms)
+        worker.pipe.send((room_id, level_name, [peer.unread() for peer in peers]))
+        for peer in peers:
+            fd = os.dup(peer.transport.get_extra_info("socket").fileno())
+            send_handle(worker.pipe, fd, worker.process.pid)
+            os.close(fd)
+        worker.rooms += 1
+        # Zamykamy tylko kopię gniazda w tym procesie — połączenie żyje dalej w procesie roboczym
+        for peer in peers:
+            peer.transport.abort()
+        print(f"[LOBBY] Pokój {room_id} ({level_name}) -> proces {worker.process.pid}")
+
+
+async def serve(port, workers):
+    loop = asyncio.get_running_loop()
+    lobby = Lobby(workers)
+
+    for worker in workers:
+        def on_worker_message(worker=worker):
+            try:
+                kind, _ = worker.pipe.recv()
+            except (EOFError, OSError):
+                # Proces roboczy padł — nie dostaje już nowych pokoi
+                loop.remove_reader(worker.pipe.fileno())
+                workers.remove(worker)
+                return
+            if kind == "closed":
+                worker.rooms -= 1
+        loop.add_reader(worker.pipe.fileno(), on_worker_message)
+
+    # SIGTERM (np. systemd, docker stop) i Ctrl+C kończą serwer normalnie, razem z procesami roboczymi
+    stopping = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    server = await start_server(lobby, port)
+    async with server:
+        await stopping.wait()
+    for worker in workers:
+        loop.remove_reader(worker.pipe.fileno())
+    print("[SERVER] Zatrzymano")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedykowany serwer Cell Expansion War")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="liczba procesów z pokojami (0 — wszystko w jednym procesie)")
+    args = parser.parse_args()
+
+    workers = [WorkerHandle() for _ in range(args.workers)]
+    try:
+        asyncio.run(serve(args.port, list(workers)))
+    finally:
+        for worker in workers:
+            worker.stop()
+
+
+if __name__ == "__main__":
+    main()
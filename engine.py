@@ -0,0 +1,371 @@
+# Silnik gry bez zależności od Qt — warstwa Qt (nodes.py, game_view.py) tylko go rysuje.
+# Ten sam kod działa w trybie headless (serwer, balans, trening AI).
+import numpy as np
+
+MAX_UNITS = 30  # limit produkcji w węźle
+UNIT_SPEED = 1.5 / 0.016  # 1.5 px na klatkę 16 ms, w px/s
+SEND_INTERVAL = 1.0  # co ile sekund połączenie wysyła jednostkę
+
+
+# Tempo produkcji (jednostki na sekundę) zależy od typu
+PRODUCTION_RATES = {
+    "plus": 1 / 1.5,  # szybsza produkcja
+    "triangle": 1 / 2.5,  # wolniejsza
+    "circle": 1 / 2.0,  # domyślna
+}
+PRODUCTION_EPSILON = 1e-9  # błąd zaokrągleń przy sumowaniu rate * dt
+
+
+def production_rate(node_type):
+    return PRODUCTION_RATES.get(node_type, PRODUCTION_RATES["circle"])
+
+
+class NodeState:
+    def __init__(self, x, y, color, is_player=False, unit_count=10, node_type="circle", max_connections=3):
+        self.x = x
+        self.y = y
+        self.color_name = color
+        self.is_player = is_player
+        self.unit_count = unit_count
+        self.node_type = node_type
+        self.max_connections = max_connections
+        self.current_connections = 0
+        self.outgoing = []  # ConnectionState wychodzące z węzła
+        self.incoming = []  # ConnectionState wchodzące do węzła
+        self.production_progress = 0.0  # ułamek następnej jednostki przenoszony między krokami
+
+    def copy(self):
+        # Kopia bez połączeń — Simulation.copy() odtwarza je na nowych węzłach
+        clone = NodeState.__new__(NodeState)
+        clone.__dict__.update(self.__dict__)
+        clone.outgoing = []
+        clone.incoming = []
+        return clone
+
+    def can_connect(self):
+        return self.current_connections < self.max_connections
+
+    def register_connection(self):
+        self.current_connections += 1
+
+    def unregister_connection(self):
+        if self.current_connections > 0:
+            self.current_connections -= 1
+
+    def decrease_unit(self, amount=1):
+        self.unit_count = max(0, self.unit_count - amount)
+
+    def produce_unit(self):
+        if self.unit_count < MAX_UNITS:
+            self.unit_count += 1
+            return True
+        return False
+
+
+class ConnectionState:
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.owner_color = source.color_name  # zakładamy że source to właściciel
+        self.send_elapsed = 0.0
+
+
+class UnitSwarm:
+    # Wszystkie jednostki w locie jako ciągłe tablice NumPy — jeden krok to kilka operacji wektorowych
+    FIELDS = ("ids", "pos", "target_pos", "speed", "target", "color", "support", "damage")
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.next_id = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.target_pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.target = np.zeros(capacity, dtype=np.int32)  # id węzła docelowego
+        self.color = np.zeros(capacity, dtype=np.int32)  # kod koloru źródła
+        self.support = np.zeros(capacity, dtype=np.int32)  # ile dodaje swojemu
+        self.damage = np.zeros(capacity, dtype=np.int32)  # ile zabiera wrogowi
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, source, target, color_code, speed=UNIT_SPEED):
+        if self.count == len(self.ids):
+            self._grow()
+        i = self.count
+        unit_id = self.next_id
+        self.next_id += 1
+        self.ids[i] = unit_id
+        self.pos[i] = (source.x, source.y)
+        self.target_pos[i] = (target.x, target.y)
+        self.speed[i] = speed
+        self.target[i] = target.id
+        self.color[i] = color_code
+        # Reguły typu źródła ustalane przy wysłaniu
+        self.support[i] = 2 if source.node_type == "plus" else 1
+        self.damage[i] = 2 if source.node_type == "triangle" else 1
+        self.count += 1
+        return unit_id
+
+    def copy(self):
+        clone = UnitSwarm.__new__(UnitSwarm)
+        clone.count = self.count
+        clone.next_id = self.next_id
+        for name in self.FIELDS:
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+    def positions(self):
+        return self.ids[:self.count], self.pos[:self.count]
+
+    def advance(self, dt):
+        # Przesuwa wszystkie jednostki; zwraca indeksy (w kolejności wysłania) tych, które dotarły
+        n = self.count
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        pos = self.pos[:n]
+        delta = self.target_pos[:n] - pos
+        # sqrt zamiast hypot: tylko podstawowe działania IEEE, więc wynik identyczny na każdej maszynie (lockstep)
+        dist = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+        travel = self.speed[:n] * dt
+
+        # Ułamek drogi do celu w tym kroku; >= 1 oznacza dotarcie
+        ratio = np.divide(travel, dist, out=np.full(n, np.inf), where=dist > 0)
+        arrived = np.flatnonzero(ratio >= 1.0)
+        np.minimum(ratio, 1.0, out=ratio)
+        delta *= ratio[:, None]
+        pos += delta
+        pos[arrived] = self.target_pos[arrived]
+        return arrived
+
+    def remove(self, indices):
+        if len(indices) == 0:
+            return
+        n = self.count
+        keep = np.ones(n, dtype=bool)
+        keep[indices] = False
+        k = int(keep.sum())
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        self.count = k
+
+
+class SpatialGrid:
+    # Siatka kubełków do zapytań o sąsiadów w promieniu (metryka Manhattan, jak manhattanLength() w AI)
+    def __init__(self, nodes, cell_size=200):
+        self.cell_size = cell_size
+        self.cells = {}
+        for node in nodes:
+            self.cells.setdefault(self._cell(node.x, node.y), []).append(node)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def query(self, x, y, radius):
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        result = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for node in self.cells.get((cx, cy), ()):
+                    if abs(node.x - x) + abs(node.y - y) < radius:
+                        result.append(node)
+        return result
+
+
+class Simulation:
+    def __init__(self):
+        self.nodes = []
+        self.connections = {}  # ConnectionState -> None, słownik jako uporządkowany zbiór
+        self.units = UnitSwarm()
+        self.color_codes = {}
+        self.colors = []
+        self.time = 0.0
+        # Węzły się nie przesuwają, więc odległości liczymy raz — unieważniane tylko przy dodaniu węzła
+        self._distances = None
+        self._grid = None
+
+    @classmethod
+    def from_level(cls, level_data):
+        # Plansza z opisu poziomu (levels.LEVELS) — dla trybu bez Qt
+        simulation = cls()
+        for node_info in level_data:
+            simulation.add_node(NodeState(
+                node_info["x"], node_info["y"], node_info["color"],
+                is_player=(node_info["color"] == "green"),
+                unit_count=node_info["units"],
+                node_type=node_info["type"],
+                max_connections=node_info.get("max_connections", 3)
+            ))
+        return simulation
+
+    def copy(self):
+        # Tania kopia całego stanu do symulacji "co by było gdyby" (AI z przeszukiwaniem)
+        clone = Simulation.__new__(Simulation)
+        clone.nodes = [node.copy() for node in self.nodes]
+        clone.connections = {}
+        for connection in self.connections:
+            source = clone.nodes[connection.source.id]
+            target = clone.nodes[connection.target.id]
+            copied = ConnectionState(source, target)
+            copied.owner_color = connection.owner_color
+            copied.send_elapsed = connection.send_elapsed
+            clone.connections[copied] = None
+            source.outgoing.append(copied)
+            target.incoming.append(copied)
+        clone.units = self.units.copy()
+        clone.color_codes = dict(self.color_codes)
+        clone.colors = list(self.colors)
+        clone.time = self.time
+        # Węzły się nie przesuwają — macierz odległości (po node.id) można współdzielić,
+        # siatka trzyma obiekty węzłów, więc budujemy ją od nowa w razie potrzeby
+        clone._distances = self._distances
+        clone._grid = None
+        return clone
+
+    def add_node(self, node):
+        node.id = len(self.nodes)
+        self.nodes.append(node)
+        self._distances = None
+        self._grid = None
+        return node
+
+    def distances(self):
+        # Macierz odległości Manhattan między wszystkimi węzłami, indeksowana po node.id
+        if self._distances is None:
+            xy = np.array([(n.x, n.y) for n in self.nodes], dtype=np.float64).reshape(-1, 2)
+            self._distances = np.abs(xy[:, None, :] - xy[None, :, :]).sum(axis=2)
+        return self._distances
+
+    def distance(self, a, b):
+        return float(self.distances()[a.id, b.id])
+
+    def nodes_near(self, x, y, radius):
+        if self._grid is None:
+            self._grid = SpatialGrid(self.nodes)
+        return self._grid.query(x, y, radius)
+
+    def nodes_within(self, node, radius):
+        return self.nodes_near(node.x, node.y, radius)
+
+    def color_code(self, color):
+        if color not in self.color_codes:
+            self.color_codes[color] = len(self.colors)
+            self.colors.append(color)
+        return self.color_codes[color]
+
+    def connect(self, source, target):
+        connection = ConnectionState(source, target)
+        self.connections[connection] = None
+        source.outgoing.append(connection)
+        target.incoming.append(connection)
+        source.register_connection()
+        return connection
+
+    def disconnect(self, connection):
+        if connection not in self.connections:
+            return
+        if connection.owner_color == connection.source.color_name:
+            connection.source.unregister_connection()
+        self._remove_connection(connection)
+
+    def _remove_connection(self, connection):
+        del self.connections[connection]
+        connection.source.outgoing.remove(connection)
+        connection.target.incoming.remove(connection)
+
+    def connections_of(self, node):
+        # Wszystkie połączenia dotykające węzła — O(stopień węzła), bez przeglądania całej planszy
+        return node.outgoing + [c for c in node.incoming if c.source is not node]
+
+    def winner(self):
+        # Ten sam warunek co wcześniej w GameView.check_game_over
+        if not any(n.is_player for n in self.nodes):
+            return "red"
+        if all(n.is_player for n in self.nodes):
+            return "green"
+        return None
+
+    def step(self, dt):
+        # Deterministyczny krok symulacji o dt sekund; zwraca listę zdarzeń dla warstwy rysującej
+        events = []
+        self.time += dt
+
+        for node in self.nodes:
+            node.production_progress += production_rate(node.node_type) * dt
+            produced = int(node.production_progress + PRODUCTION_EPSILON)
+            if produced:
+                node.production_progress -= produced
+                changed = False
+                for _ in range(produced):
+                    changed = node.produce_unit() or changed
+                if changed:
+                    events.append({"type": "produce", "node": node})
+
+        for connection in list(self.connections):
+            connection.send_elapsed += dt
+            while connection.send_elapsed >= SEND_INTERVAL:
+                connection.send_elapsed -= SEND_INTERVAL
+                source = connection.source
+                if source.unit_count > 0:
+                    unit_id = self.units.spawn(source, connection.target, self.color_code(source.color_name))
+                    source.decrease_unit(1)
+                    events.append({"type": "spawn", "unit": unit_id, "connection": connection})
+
+        arrived = self.units.advance(dt)
+        for i in arrived:
+            self._resolve_arrival(i, events)
+        self.units.remove(arrived)
+
+        return events
+
+    def fast_forward(self, seconds, dt=1 / 60):
+        # Symulacja szybciej niż w czasie rzeczywistym — zdarzenia ze wszystkich kroków
+        events = []
+        while seconds > 1e-9:
+            step = min(dt, seconds)
+            events.extend(self.step(step))
+            seconds -= step
+        return events
+
+    def _resolve_arrival(self, i, events):
+        units = self.units
+        unit_id = int(units.ids[i])
+        target = self.nodes[units.target[i]]
+        source_color = self.colors[units.color[i]]
+
+        if target.color_name == source_color:
+            # Wysyłanie do swojego — wsparcie
+            target.unit_count += int(units.support[i])
+            events.append({"type": "arrive", "unit": unit_id, "target": target, "kind": "support"})
+            return
+
+        # Atak na wroga
+        target.decrease_unit(int(units.damage[i]))
+        events.append({"type": "arrive", "unit": unit_id, "target": target, "kind": "attack"})
+
+        # Sprawdź, czy przejmujemy
+        if target.unit_count == 0:
+            target.color_name = source_color
+            target.is_player = (source_color == "green")
+            target.unit_count = 1
+            target.current_connections = 0
+
+            # Usuń stare linie
+            removed = []
+            for connection in self.connections_of(target):
+                if connection.owner_color == connection.source.color_name:
+                    connection.source.unregister_connection()
+                self._remove_connection(connection)
+                removed.append(connection)
+
+            events.append({"type": "capture", "node": target, "removed": removed})
@@ -1,14 +1,23 @@
-import json
 import logging
 import random
 from PyQt5.QtCore import Qt, QRectF, QObject
-from PyQt5.QtCore import QPointF, QTimer
+from PyQt5.QtCore import QPointF, QTimer, QElapsedTimer
 from PyQt5.QtGui import QPixmap, QBrush, QColor, QPainter
 from PyQt5.QtWidgets import QLabel, QGraphicsPixmapItem, QHBoxLayout, QWidget, QPushButton, QGraphicsView, \
     QGraphicsScene, QVBoxLayout, QGraphicsItem
-from mongo_client import game_history_collection
-from nodes import BaseNode, ConnectionLine, PreviewLine, HintLine
-import xml.etree.ElementTree as ET
+from history_writer import history_writer
+from engine import Simulation
+from nodes import BaseNode, ConnectionLine, PreviewLine, HintLine, UnitLayer, HealingEffect, SparkEffect, cached_pixmap, \
+    warm_pixmap_cache
+
+import ai
+from ai_worker import AIWorker
+from ai_search import MonteCarloSearch
+from lockstep import LockstepSession, INPUT_DELAY
+from replay import ReplayWriter, new_replay_path
+from replay_player import ReplayPlayer, REPLAY_SPEEDS
+
+PENDING_MOVE_TIMEOUT = 2.0  # s — po tym czasie host uznał nasz ruch za niepoprawny (nie ma go w migawkach)
 
 
 
@@ -77,7 +86,7 @@ class GameEndOverlay(QGraphicsItem):
             })
 
 class GameView(QGraphicsView):
-    def __init__(self, level_data, level_name, main_window, mode="single"):
+    def __init__(self, level_data, level_name, main_window, mode="single", ai_mode="greedy"):
         super().__init__(main_window)
 
         print("[DEBUG] GameView init started")
@@ -94,7 +103,35 @@ class GameView(QGraphicsView):
         self.level_data = level_data
         self.level_name = level_name
         self.main_window = main_window
+        self.simulation = Simulation()
+        self.node_views = {}  # NodeState -> BaseNode
+        self.nodes_by_id = {}  # id węzła -> BaseNode
+        self.connection_lines = {}  # ConnectionState -> ConnectionLine
+        self.lockstep = None  # lockstep.LockstepSession w sieciowym trybie lockstep
+        self.pending_moves = {}  # (id źródła, id celu) -> czas wysłania; własne ruchy jeszcze nie w migawce hosta
+        self.replay_player = None  # replay_player.ReplayPlayer w trybie "replay"
         self.create_scene()
+
+        # Powtórka zapisywana na bieżąco: zdarzenia + co KEYFRAME_INTERVAL pełny stan
+        self.replay_writer = None
+        if self.mode != "replay":
+            self.replay_writer = ReplayWriter(new_replay_path(level_name), level_name)
+            self.replay_writer.write_keyframe(self.simulation)
+
+        # Jedna pętla gry zamiast osobnego QTimera dla każdej jednostki i każdego węzła
+        self.time_scale = 1.0
+        self.paused = False
+        self.frozen_timers = []  # zegary wstrzymane przez pauzę, wznawiane razem z grą
+        self.frame_clock = QElapsedTimer()
+        self.frame_clock.start()
+        self.game_loop_timer = QTimer()
+        self.game_loop_timer.timeout.connect(self.game_tick)
+        self.game_loop_timer.start(16)
+
+        self.ai_mode = ai_mode  # "greedy" — heurystyka z ai.py, "search" — Monte Carlo z ai_search.py
+        self.ai_search = MonteCarloSearch(time_budget=1.5) if ai_mode == "search" else None
+        self.ai_worker = AIWorker()
+        self.ai_worker.move_ready.connect(self.apply_ai_move)
         self.ai_timer = QTimer()
         self.ai_timer.timeout.connect(self.enemy_ai_turn)
 
@@ -102,6 +139,7 @@ class GameView(QGraphicsView):
             self.ai_timer.start(2000)
 
         self.hint_line = None
+        self.pulsing_node = None
 
         self.preview_lines = []
         self.preview_visible = False
@@ -144,20 +182,185 @@ class GameView(QGraphicsView):
             "red": False
         }
 
+    def game_tick(self):
+        # Rzeczywisty czas od poprzedniej klatki (ograniczony, żeby po zawieszeniu nie "teleportować")
+        dt = min(self.frame_clock.restart() / 1000.0, 0.1)
+        if self.replay_player is not None:
+            events = self.replay_player.advance(dt)
+            self.update_replay_label()
+        elif self.lockstep is not None:
+            # Czas gry płynie stałymi tickami wspólnymi z przeciwnikiem — bez pauzy i przyspieszania
+            events = self.lockstep.advance(dt)
+        elif self.paused:
+            return
+        else:
+            events = self.simulation.step(dt * self.time_scale)
+        game_over_check = False
+        for event in events:
+            if event["type"] == "produce":
+                self.node_views[event["node"]].update()
+            elif event["type"] == "spawn":
+                self.connection_lines[event["connection"]].start_node.update()
+            elif event["type"] == "arrive":
+                self.on_unit_arrived(event["unit"], event["target"], event["kind"])
+            elif event["type"] == "capture":
+                self.on_node_captured(event["node"], event["removed"])
+                game_over_check = True
+
+        self.unit_layer.sync()
+        if self.replay_writer is not None:
+            self.replay_writer.maybe_keyframe(self.simulation)
+
+        if game_over_check and self.replay_player is None:
+            self.check_game_over()
+
+    def update_replay_label(self):
+        player = self.replay_player
+        elapsed, total = int(player.time), int(player.duration)
+        self.round_label.setText(f"Powtórka {elapsed // 60}:{elapsed % 60:02} / {total // 60}:{total % 60:02} "
+                                 f"({player.speed}x)")
+
+    def set_time_scale(self, scale):
+        self.time_scale = max(0.0, scale)
+        self.sync_clock_timers()
+
+    def set_paused(self, paused):
+        self.paused = paused
+        self.sync_clock_timers()
+
+    def sync_clock_timers(self):
+        # Zegar rundy i ruchy AI idą w czasie gry, nie ściennym: pauza (albo skala 0) je wstrzymuje,
+        # przyspieszenie skraca interwały. Lockstep i powtórka mają własny czas — tam bez zmian
+        if self.lockstep is not None or self.replay_player is not None:
+            return
+        frozen = self.paused or self.time_scale == 0
+        for timer, interval in ((self.round_timer, 1000), (self.ai_timer, 2000)):
+            if frozen:
+                if timer.isActive():
+                    timer.stop()
+                    self.frozen_timers.append(timer)
+            elif timer.isActive() or timer in self.frozen_timers:
+                timer.start(max(1, int(interval / self.time_scale)))
+        if not frozen:
+            self.frozen_timers = []
+
+    def on_unit_arrived(self, unit_id, target, kind):
+        position = QPointF(target.x, target.y)
+        if kind == "support":
+            self.scene.addItem(HealingEffect(position, self.scene))
+        else:
+            self.scene.addItem(SparkEffect(position, self.scene, color=QColor(255, 215, 0)))
+        self.node_views[target].update()
+
+    def on_node_captured(self, node_state, removed_connections):
+        for connection in removed_connections:
+            line = self.connection_lines.pop(connection, None)
+            if line is not None:
+                line.start_node.update()
+                self.scene.removeItem(line)
+        node = self.node_views[node_state]
+        node.play_capture_animation()
+        node.update()
+
+    def add_node(self, node, by=None):
+        # Jedyne miejsce dodawania węzłów (plansza, przeciąganie, wczytanie historii) — tu węzeł dostaje id.
+        # Z podanym by (np. "player") węzeł postawiony w trakcie meczu trafia do historii i powtórki
+        self.nodes.append(node)
+        self.simulation.add_node(node.state)
+        self.node_views[node.state] = node
+        self.nodes_by_id[node.node_id] = node
+        self.scene.addItem(node)
+        if by is not None:
+            self.record_event({"type": "add_node", "node": node.node_id, "x": node.state.x, "y": node.state.y,
+                               "color": node.color_name, "units": node.unit_count,
+                               "node_type": node.state.node_type,
+                               "max_connections": node.state.max_connections, "by": by})
+
+    def connect_nodes(self, source, target):
+        connection = self.simulation.connect(source.state, target.state)
+        line = ConnectionLine(source, target, connection)
+        self.connection_lines[connection] = line
+        self.scene.addItem(line)
+        source.update()
+        return line
+
+    def remove_connection(self, line, by=None):
+        # Z podanym by — rozłączenie przez gracza, zapisywane jak ruch (migawki hosta i przejęcia węzłów nie)
+        if by is not None and line.connection in self.simulation.connections:
+            self.log_event("disconnect", line.connection.source.id, line.connection.target.id, by)
+        self.simulation.disconnect(line.connection)
+        self.connection_lines.pop(line.connection, None)
+        if line.scene():
+            self.scene.removeItem(line)
+        line.start_node.update()
+
+    def on_connection_clicked(self, line):
+        # W lockstep usunięcie zmieniłoby tylko lokalną symulację (ramki wejścia niosą same połączenia),
+        # a powtórka jest tylko do oglądania — w obu kliknięcie linii nic nie robi
+        if self.lockstep is not None or self.mode == "replay":
+            return
+        self.remove_connection(line, by="player")
+
+    def start_lockstep(self, local_color, send, input_delay=INPUT_DELAY):
+        remote_color = "red" if local_color == "green" else "green"
+        self.lockstep = LockstepSession(
+            self.simulation, local_color, remote_color, send,
+            lambda color, from_id, to_id: self.perform_connection(
+                from_id, to_id, triggered_by_network=(color != local_color)),
+            input_delay=input_delay)
+        return self.lockstep
+
+    def apply_snapshot(self, state):
+        # Uzgodnienie z migawką hosta (state_sync.BoardState): właściciele, jednostki i połączenia
+        # są nadpisywane, lokalna symulacja tylko przewiduje stan między migawkami
+        captured = False
+        for node_state, (color, units) in zip(self.simulation.nodes, state.nodes):
+            node = self.node_views[node_state]
+            if node.color_name != color:
+                node.color_name = color
+                node.is_player = (color == "green")
+                node.play_capture_animation()
+                captured = True
+            node.unit_count = units
+            node.update()
+
+        # Własny ruch, którego host jeszcze nie dostał, zostaje na planszy (bez mrugania linii
+        # i zerowania licznika wysyłki) — znika z listy, gdy pojawi się w migawce albo minie limit czasu
+        for pair, sent_at in list(self.pending_moves.items()):
+            if pair in state.connections or self.simulation.time - sent_at > PENDING_MOVE_TIMEOUT:
+                del self.pending_moves[pair]
+
+        current = {(c.source.id, c.target.id): c for c in self.simulation.connections}
+        for pair, connection in current.items():
+            if pair not in state.connections and pair not in self.pending_moves:
+                self.remove_connection(self.connection_lines[connection])
+        for source_id, target_id in state.connections.difference(current):
+            self.connect_nodes(self.node_by_id(source_id), self.node_by_id(target_id))
+        for node_state in self.simulation.nodes:
+            node_state.current_connections = len(node_state.outgoing)
+
+        if captured:
+            self.check_game_over()
+
     def set_current_player(self, color):
         self.current_player = color
         self.has_made_move = False
 
     def log_event(self, type_, source, target, by):
-        time_stamp = 120 - self.round_time_seconds
-        self.game_history_events.append({
+        self.record_event({
             "type": type_,
             "from": source,
             "to": target,
-            "by": by,
-            "time": time_stamp
+            "by": by
         })
 
+    def record_event(self, event):
+        # Historia (XML / MongoDB / magazyn lokalny) dostaje czas rundy, powtórka — dokładny czas symulacji
+        event["time"] = 120 - self.round_time_seconds
+        self.game_history_events.append(event)
+        if self.replay_writer is not None:
+            self.replay_writer.write_event(self.simulation.time, event)
+
     def update_round_timer(self):
         self.round_time_seconds -= 1
         minutes = self.round_time_seconds // 60
@@ -197,24 +400,37 @@ class GameView(QGraphicsView):
             """)
 
     def check_game_over(self):
+        # Powtórka nie kończy meczu ani nie zapisuje historii — to tylko odtworzenie zapisanej gry
+        if self.mode == "replay":
+            return
+        winner = self.simulation.winner()
 
-        green_nodes = [n for n in self.nodes if n.is_player]
-        red_nodes = [n for n in self.nodes if not n.is_player]
-
-        if not green_nodes:
+        if winner == "red":
             self.show_end_message("Przegrałeś", "Twoje jednostki zostały pokonane.")
-        elif not red_nodes:
+        elif winner == "green":
             self.show_end_message("Wygrałeś", "Pokonałeś wszystkich przeciwników!")
 
-    def show_end_message(self, title, message):
+    def teardown(self):
+        # Sprzątanie przed porzuceniem widoku (koniec gry, Restart, Menu): timery, pule AI, otwarte pliki.
+        # Można wołać kilka razy
+        for timer in (self.game_loop_timer, self.round_timer, self.ai_timer, self.flash_timer):
+            timer.stop()
+        self.stop_hint_animation()
+        self.ai_worker.shutdown()
+        if self.ai_search:
+            self.ai_search.shutdown()
+        if self.replay_writer is not None:
+            self.replay_writer.close(self.simulation)
+            self.replay_writer = None
+        if self.replay_player is not None:
+            self.replay_player.close()
+            self.replay_player = None
+        self.lockstep = None
 
-        self.save_game_history(f"historia_{self.level_name}.xml")
+    def show_end_message(self, title, message):
 
-        self.round_timer.stop()
-        self.ai_timer.stop()
-        self.flash_timer.stop()
-        for node in self.nodes:
-            node.production_timer.stop()
+        self.save_game_history()
+        self.teardown()
 
         is_win = "wygra" in title.lower() or "wygrana" in title.lower()
         color = QColor("green") if is_win else QColor("red")
@@ -235,73 +451,35 @@ class GameView(QGraphicsView):
         if not red_nodes or not green_nodes:
             return
 
-        best_move = None
-        best_score = float('-inf')
-
-        for red_node in red_nodes:
-            if red_node.unit_count < 2 or not red_node.can_connect():
-                continue
-
-            # Possibble to connect
-            possible_targets = [node for node in self.nodes if node != red_node and node.can_connect()]
-
-            for target_node in possible_targets:
-                distance = (red_node.pos() - target_node.pos()).manhattanLength()
-
-                score = 0
-
-                # attack green
-                if target_node.color_name == "green":
-                    if red_node.unit_count <= target_node.unit_count:
-                        continue  # if not enough cells not attacking
-
-                    score += (red_node.unit_count - target_node.unit_count) * 10
-                    score -= distance * 0.2  # closer is better
-                    if target_node.node_type == "plus":
-                        score += 20  # bonus for type plus of node
-
-                    # security of attack
-                    remaining_units = red_node.unit_count - target_node.unit_count
-                    if remaining_units < 3:
-                        score -= 30  # punishment for risk attack
-
-                # support red
-                elif target_node.color_name == "red":
-                    if target_node.unit_count >= red_node.unit_count:
-                        continue  # not sending if there is too  much
-
-                    score += (target_node.unit_count) * -5  # priority of sending, if lower then bigger priority
-                    score -= distance * 0.1
-
-                    # checking green around
-                    nearby_enemies = [
-                        n for n in green_nodes
-                        if (n.pos() - target_node.pos()).manhattanLength() < 200
-                    ]
-                    if nearby_enemies:
-                        score += 15  # if gree is endangered +priority
-
-                else:
-                    continue
-
-                if score > best_score:
-                    best_score = score
-                    best_move = (red_node, target_node)
-
-        if best_move:
-            source, target = best_move
-            line = ConnectionLine(source, target, self.scene)
-            self.scene.addItem(line)
-            source.register_connection()
-            self.log_event(
-                type_="attack" if target.color_name == "green" else "support",
-                source=self.nodes.index(source),
-                target=self.nodes.index(target),
-                by="AI"
-            )
+        # Ocena w wątku roboczym na kopii stanu, GUI nie czeka
+        if self.ai_search:
+            self.ai_worker.request_move(self.simulation.copy(), "red", "green", ai.ENEMY_AI_WEIGHTS,
+                                        search=self.ai_search)
+        else:
+            snapshot = ai.BoardSnapshot(self.simulation)
+            self.ai_worker.request_move(snapshot, "red", "green", ai.ENEMY_AI_WEIGHTS)
+
+    def apply_ai_move(self, move):
+        if not self.game_loop_timer.isActive():
+            return  # gra już się skończyła
+
+        if move:
+            source, target = (self.node_by_id(node_id) for node_id in move)
+            # Kopia stanu mogła się zdezaktualizować w trakcie liczenia — sprawdzamy ruch jeszcze raz
+            if source.color_name == "red" and source.can_connect() and target.can_connect():
+                self.connect_nodes(source, target)
+                self.log_event(
+                    type_="attack" if target.color_name == "green" else "support",
+                    source=source.node_id,
+                    target=target.node_id,
+                    by="AI"
+                )
 
         self.check_game_over()
 
+    def node_by_id(self, node_id):
+        return self.nodes_by_id.get(node_id)
+
     def create_scene(self):
         self.setSceneRect(0, 0, 1024, 768)
         self.setFixedSize(1040, 788)
@@ -310,6 +488,12 @@ class GameView(QGraphicsView):
         if not bg_pixmap.isNull():
             self.scene.setBackgroundBrush(QBrush(bg_pixmap))
 
+        # Obrazki skalujemy raz tutaj, a nie przy każdym paint()
+        warm_pixmap_cache(["green", "red"])
+
+        self.unit_layer = UnitLayer(self.simulation.units)
+        self.scene.addItem(self.unit_layer)
+
         self.nodes = []
         for node_info in self.level_data:
             node = BaseNode(
@@ -323,8 +507,7 @@ class GameView(QGraphicsView):
                 max_connections=node_info.get("max_connections", 3)  # domyślnie 3
             )
 
-            self.nodes.append(node)
-            self.scene.addItem(node)
+            self.add_node(node)
 
         self.add_menu_buttons()
 
@@ -385,7 +568,7 @@ class GameView(QGraphicsView):
         node_layout.setSpacing(10)
 
         for node_type in ["circle", "plus", "triangle"]:
-            pixmap = QPixmap(f":/images/green_{'node' if node_type == 'circle' else node_type}.png").scaled(48, 48,Qt.KeepAspectRatio,Qt.SmoothTransformation)
+            pixmap = cached_pixmap("green", node_type, 48)
             label = DraggableLabel(pixmap, node_type, self)
             node_layout.addWidget(label)
 
@@ -395,6 +578,8 @@ class GameView(QGraphicsView):
         self.update_node_menu_position()
 
     def start_drag_node(self, node_type, pixmap):
+        if self.mode == "replay":
+            return
         if self.mode == "network":
                 print("Dodawanie węzłów zablokowane w trybie sieciowym.")
                 return
@@ -432,82 +617,14 @@ class GameView(QGraphicsView):
 
         green_nodes = [n for n in self.nodes if n.color_name == "green"]
         red_nodes = [n for n in self.nodes if n.color_name == "red"]
-        all_nodes = self.nodes
 
         if not green_nodes or not red_nodes:
             return
 
-
-        dominance = len(green_nodes) - len(red_nodes)
-
-        best_score = float('-inf')
-        best_pair = None
-
-        for source in green_nodes:
-            if not source.can_connect() or source.unit_count < 2:
-                continue
-
-            for target in all_nodes:
-                if source == target:
-                    continue
-                if target.current_connections >= target.max_connections:
-                    continue
-
-                distance = (source.pos() - target.pos()).manhattanLength()
-
-                score = 0
-                action_type = None
-
-                if target.color_name == "red":
-                    if target.unit_count >= source.unit_count:
-                        continue
-
-                    score += (source.unit_count - target.unit_count) * 10
-
-                    # Kara za odleglosc
-                    score -= distance * 0.2
-
-                    # priorytet plusów
-                    if target.node_type == "plus":
-                        score += 20
-
-                    # premia za zielonego blisko
-                    allies_near = [a for a in green_nodes if (a.pos() - target.pos()).manhattanLength() < 150]
-                    score += len(allies_near) * 5
-
-                    action_type = "attack"
-
-                elif target.color_name == "green":
-                    if target.unit_count >= source.unit_count:
-                        continue
-
-
-                    score += (source.unit_count - target.unit_count) * 3
-                    score -= distance * 0.1
-
-                    # zwiskzamy priorytet gdy wrogowie w poblizu
-                    enemies_near = [e for e in red_nodes if (e.pos() - target.pos()).manhattanLength() < 200]
-                    if enemies_near and target.unit_count < 6:
-                        score += 15
-
-                    action_type = "support"
-
-                else:
-                    continue
-
-
-                if dominance < 0 and action_type == "support":
-                    score += 10
-
-                if dominance > 2 and action_type == "attack":
-                    score += 10
-
-                if score > best_score:
-                    best_score = score
-                    best_pair = (source, target)
+        best_pair = ai.best_move(ai.BoardSnapshot(self.simulation), "green", "red", ai.HINT_WEIGHTS)
 
         if best_pair:
-            source, target = best_pair
+            source, target = (self.node_by_id(node_id) for node_id in best_pair)
             self.hint_line = HintLine(source, target)
             self.scene.addItem(self.hint_line)
             self.pulsing_node = target
@@ -516,22 +633,20 @@ class GameView(QGraphicsView):
 
             QTimer.singleShot(5000, self.remove_hint_line)
 
-    def perform_connection(self, from_pos, to_pos, triggered_by_network=False):
-        from_node = next((n for n in self.nodes if int(n.pos().x()) == from_pos[0] and int(n.pos().y()) == from_pos[1]),None)
-        to_node = next((n for n in self.nodes if int(n.pos().x()) == to_pos[0] and int(n.pos().y()) == to_pos[1]), None)
-
-        if not from_node or not to_node:
+    def perform_connection(self, from_id, to_id, triggered_by_network=False):
+        # Ruchy z sieci wskazują węzły po id (wire.encode_connect)
+        from_node = self.node_by_id(from_id)
+        to_node = self.node_by_id(to_id)
+        if from_node is None or to_node is None or from_node is to_node:
             print("[DEBUG] perform_connection: Nie znaleziono węzłów")
             return
 
         if from_node.can_connect() and to_node.can_connect():
-            line = ConnectionLine(from_node, to_node, self.scene)
-            self.scene.addItem(line)
-            from_node.register_connection()
+            self.connect_nodes(from_node, to_node)
             self.log_event(
                 type_="attack" if to_node.color_name == "red" else "support",
-                source=self.nodes.index(from_node),
-                target=self.nodes.index(to_node),
+                source=from_node.node_id,
+                target=to_node.node_id,
                 by="network" if triggered_by_network else "player"
             )
             self.check_game_over()
@@ -609,13 +724,14 @@ class GameView(QGraphicsView):
             item = layout.itemAt(i).widget()
             if isinstance(item, DraggableLabel):
                 node_type = item.node_type
-                new_pixmap = QPixmap(f":/images/{color}_{'node' if node_type == 'circle' else node_type}.png").scaled(
-                    48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                )
-                item.setPixmap(new_pixmap)
+                item.setPixmap(cached_pixmap(color, node_type, 48))
                 item.repaint()
 
     def mousePressEvent(self, event):
+        # W powtórce plansza tylko do oglądania — kliknięcia trafiają jedynie do przycisków menu
+        if self.mode == "replay":
+            super().mousePressEvent(event)
+            return
         item = self.itemAt(event.pos())
         while item and not isinstance(item, BaseNode):
             item = item.parentItem()
@@ -637,6 +753,9 @@ class GameView(QGraphicsView):
         super().mouseMoveEvent(event)
 
     def mouseDoubleClickEvent(self, event):
+        if self.mode == "replay":
+            super().mouseDoubleClickEvent(event)
+            return
         item = self.itemAt(event.pos())
         while item and not isinstance(item, BaseNode):
             item = item.parentItem()
@@ -658,6 +777,9 @@ class GameView(QGraphicsView):
         super().mouseDoubleClickEvent(event)
 
     def mouseReleaseEvent(self, event):
+        if self.mode == "replay":
+            super().mouseReleaseEvent(event)
+            return
         if self.selected_node:
             target_item = self.itemAt(event.pos())
             if isinstance(target_item, BaseNode) and target_item != self.selected_node:
@@ -685,23 +807,24 @@ class GameView(QGraphicsView):
                         self.has_made_move = True
 
                         if hasattr(self.main_window, 'turn_manager'):
-                            from_pos = [int(self.selected_node.pos().x()), int(self.selected_node.pos().y())]
-                            to_pos = [int(target_item.pos().x()), int(target_item.pos().y())]
                             self.main_window.turn_manager.send_move({
                                 "action": "connect",
-                                "from": from_pos,
-                                "to": to_pos
+                                "from": self.selected_node.state.id,
+                                "to": target_item.state.id
                             })
-
-                    line = ConnectionLine(self.selected_node, target_item, self.scene)
-                    self.scene.addItem(line)
-                    self.selected_node.register_connection()
-                    self.log_event(
-                        type_="attack" if target_item.color_name == "red" else "support",
-                        source=self.nodes.index(self.selected_node),
-                        target=self.nodes.index(target_item),
-                        by="player"
-                    )
+                            if self.lockstep is None:
+                                self.pending_moves[(self.selected_node.state.id, target_item.state.id)] = \
+                                    self.simulation.time
+
+                    # W lockstep ruch wykona się dopiero na swoim ticku (LockstepSession -> perform_connection)
+                    if self.lockstep is None:
+                        self.connect_nodes(self.selected_node, target_item)
+                        self.log_event(
+                            type_="attack" if target_item.color_name == "red" else "support",
+                            source=self.selected_node.node_id,
+                            target=target_item.node_id,
+                            by="player"
+                        )
 
             self.check_game_over()
 
@@ -711,12 +834,7 @@ class GameView(QGraphicsView):
         # Obsługa dodawania nowego węzła przez przeciąganie
         if hasattr(self, 'drag_node_item') and self.drag_node_item:
             scene_pos = self.mapToScene(event.pos())
-            valid = True
-
-            for node in self.nodes:
-                if (node.pos() - scene_pos).manhattanLength() < 70:
-                    valid = False
-                    break
+            valid = not self.simulation.nodes_near(scene_pos.x(), scene_pos.y(), 70)
 
             if valid:
                 player_color = self.current_player if self.mode == "2_players" else "green"
@@ -731,8 +849,7 @@ class GameView(QGraphicsView):
                     max_connections=3
                 )
 
-                self.scene.addItem(new_node)
-                self.nodes.append(new_node)
+                self.add_node(new_node, by="player")
                 if self.mode == "2_players":
                     self.node_added_by[self.current_player] = True
                 else:
@@ -752,119 +869,87 @@ class GameView(QGraphicsView):
             self.pulsing_node = None
 
     def load_game_history(self, filename):
-        tree = ET.parse(filename)
-        root = tree.getroot()
-        self.level_name = root.attrib.get("level", "unknown")
+        # Odtworzenie zapisanego meczu od początku: powtórka .cewr (z klatkami kluczowymi) albo historia XML
+        if filename.endswith(".cewr"):
+            player = ReplayPlayer.from_replay(filename)
+        else:
+            player = ReplayPlayer.from_history_xml(filename)
+        self.start_replay(player)
+
+    def start_replay(self, player):
+        if self.replay_writer is not None:
+            self.replay_writer.close()
+            self.replay_writer = None
+        self.ai_timer.stop()
+        self.round_timer.stop()
+        self.flash_timer.stop()
 
+        self.level_name = player.level_name
+        self.replay_player = player
+        player.connect = lambda source, target: self.connect_nodes(self.node_views[source], self.node_views[target])
+        player.disconnect = lambda connection: self.remove_connection(self.connection_lines[connection])
+        player.add_node = lambda state: self.add_node(BaseNode.from_state(state))
+        self.show_simulation(player.simulation)
+        self.setFocus()
+
+    def show_simulation(self, simulation):
+        # Podmienia rysowaną planszę na podany stan (po skoku w powtórce), bez czyszczenia menu i etykiet
+        for item in self.nodes + list(self.connection_lines.values()) + [self.unit_layer]:
+            if item.scene():
+                self.scene.removeItem(item)
+        self.simulation = simulation
         self.nodes = []
-        self.scene.clear()
-
-        node_map = {}
-        for node_elem in root.findall("node"):
-            x = int(node_elem.attrib["x"])
-            y = int(node_elem.attrib["y"])
-            color = node_elem.attrib["color"]
-            units = int(node_elem.attrib["units"])
-            node_type = node_elem.attrib["type"]
-
-            node = BaseNode(x=x, y=y, radius=30, color=color,
-                            is_player=(color == "green"), initial_units=units,
-                            node_type=node_type, max_connections=3)
-            self.scene.addItem(node)
+        self.node_views = {}
+        self.nodes_by_id = {}
+        self.connection_lines = {}
+        self.unit_layer = UnitLayer(simulation.units)
+        self.scene.addItem(self.unit_layer)
+
+        for state in simulation.nodes:
+            node = BaseNode.from_state(state)
             self.nodes.append(node)
-            node_map[node_elem.attrib["id"]] = node
-
-        for conn in root.findall("connection"):
-            src = node_map.get(conn.attrib["from"])
-            tgt = node_map.get(conn.attrib["to"])
-            if src and tgt:
-                line = ConnectionLine(src, tgt, self.scene)
-                self.scene.addItem(line)
-
-    def save_game_history(self, filename="historia.xml"):
-        try:
-            print("===> Rozpoczynam zapis historii gry...")
-
-            root = ET.Element("game", level=self.level_name, duration=str(120 - self.round_time_seconds))
-
-            node_id_map = {}
-            for idx, node in enumerate(self.nodes):
-                try:
-                    node_id = str(idx)
-                    node_id_map[node] = node_id
-                    ET.SubElement(root, "node", {
-                        "id": node_id,
-                        "x": str(int(node.pos().x())),
-                        "y": str(int(node.pos().y())),
-                        "color": getattr(node, "color", "unknown"),
-                        "units": str(node.unit_count),
-                        "type": node.node_type
-                    })
-                except Exception as e:
-                    print(f"[BŁĄD przy zapisie node'a {idx}]: {e}")
-
-            for event in self.game_history_events:
-                try:
-                    ET.SubElement(root, "event", {
-                        "type": event["type"],
-                        "from": str(event["from"]),
-                        "to": str(event["to"]),
-                        "by": event["by"],
-                        "time": str(event["time"])
-                    })
-                except Exception as e:
-                    print(f"[BŁĄD przy zapisie eventu]: {e}")
-
-            tree = ET.ElementTree(root)
-            tree.write(filename, encoding="utf-8", xml_declaration=True)
-            print(f"✅ Zapisano historię do pliku: {filename}")
-
-        except Exception as e:
-            print(f"[FATALNY BŁĄD] save_game_history: {e}")
-        try:
-            game_history_collection.insert_one({
-                "level": self.level_name,
-                "duration": 120 - self.round_time_seconds,
-                "nodes": [
-                    {
-                        "x": int(node.pos().x()),
-                        "y": int(node.pos().y()),
-                        "color": node.color,
-                        "units": node.unit_count,
-                        "type": node.node_type
-                    }
-                    for node in self.nodes
-                ],
-                "events": self.game_history_events
-            })
-            print("✅ Historia gry zapisana do MongoDB.")
-        except Exception as e:
-            print(f"[Błąd MongoDB] {e}")
-
-        try:
-            json_data = {
-                "level": self.level_name,
-                "duration": 120 - self.round_time_seconds,
-                "nodes": [
-                    {
-                        "x": int(node.pos().x()),
-                        "y": int(node.pos().y()),
-                        "color": node.color,
-                        "units": node.unit_count,
-                        "type": node.node_type
-                    }
-                    for node in self.nodes
-                ],
-                "events": self.game_history_events
-            }
-
-            with open("historia.json", "w", encoding="utf-8") as f:
-                json.dump(json_data, f, indent=4, ensure_ascii=False)
-
-            print("✅ Zapisano historię do JSON (historia.json)")
-        except Exception as e:
-            print(f"[Błąd JSON] {e}")
+            self.node_views[state] = node
+            self.nodes_by_id[state.id] = node
+            self.scene.addItem(node)
+        for connection in simulation.connections:
+            line = ConnectionLine(self.node_views[connection.source], self.node_views[connection.target], connection)
+            self.connection_lines[connection] = line
+            self.scene.addItem(line)
+        self.unit_layer.sync()
 
+    def keyPressEvent(self, event):
+        # Powtórka: 1 / 2 / 3 — tempo 1x / 10x / 100x, strzałki — skok o 10 s
+        if self.replay_player is None:
+            super().keyPressEvent(event)
+            return
+        speed_keys = dict(zip((Qt.Key_1, Qt.Key_2, Qt.Key_3), REPLAY_SPEEDS))
+        if event.key() in speed_keys:
+            self.replay_player.set_speed(speed_keys[event.key()])
+        elif event.key() in (Qt.Key_Left, Qt.Key_Right):
+            jump = 10 if event.key() == Qt.Key_Right else -10
+            self.show_simulation(self.replay_player.seek(max(0.0, self.replay_player.time + jump)))
+
+    def save_game_history(self):
+        # Rekord składamy tu (szybko, w wątku GUI), zapis do XML / MongoDB / JSON idzie w tle
+        print("===> Rozpoczynam zapis historii gry...")
+        history_writer.submit({
+            "level": self.level_name,
+            "duration": 120 - self.round_time_seconds,
+            # None, gdy skończył się czas — taki mecz nie wchodzi do statystyk wygranych (history_analytics.py)
+            "winner": self.simulation.winner(),
+            "nodes": [
+                {
+                    "id": node.node_id,
+                    "x": int(node.pos().x()),
+                    "y": int(node.pos().y()),
+                    "color": node.color,
+                    "units": node.unit_count,
+                    "type": node.node_type
+                }
+                for node in self.nodes
+            ],
+            "events": list(self.game_history_events)
+        })
 
 class DraggableLabel(QLabel):
     def __init__(self, pixmap, node_type, parent_view):
@@ -0,0 +1,140 @@
+# Statystyki zapisanych gier z MongoDB (game_history_collection).
+# Potoki agregacji liczą wszystko po stronie bazy; summarize() przechodzi strumieniowo po kursorze
+# (albo dowolnym iteratorze rekordów), więc nawet miliony gier nie trafiają naraz do pamięci.
+#
+#   python history_analytics.py [--stream]
+import argparse
+
+from pymongo import ASCENDING
+
+from mongo_client import game_history_collection
+
+PLAYER_COLOR = "green"
+STREAM_BATCH_SIZE = 1000
+# Do statystyk nie są potrzebne węzły — nie przesyłamy ich z bazy
+SUMMARY_PROJECTION = {"level": 1, "duration": 1, "winner": 1, "events.type": 1, "events.by": 1, "_id": 0}
+
+
+def ensure_indexes(collection=game_history_collection):
+    # Idempotentne; (level, winner) obsługuje też same zapytania po level
+    collection.create_index([("level", ASCENDING), ("winner", ASCENDING)])
+    collection.create_index([("duration", ASCENDING)])
+    collection.create_index([("winner", ASCENDING)])
+
+
+def _level_match(level):
+    return [{"$match": {"level": level}}] if level is not None else []
+
+
+def _rates(games, decided, wins):
+    # Gra pokazuje koniec czasu jako "Przegrana", więc win_rate liczy go jako przegraną;
+    # decided_win_rate to odsetek wygranych tylko wśród meczów ze zwycięzcą
+    return {"games": games, "decided": decided, "wins": wins,
+            "win_rate": wins / games if games else None,
+            "decided_win_rate": wins / decided if decided else None}
+
+
+def win_rates(collection=game_history_collection):
+    # {poziom: {"games", "decided", "wins", "win_rate", "decided_win_rate"}} — wygrane gracza (zielonych)
+    pipeline = [
+        {"$group": {
+            "_id": "$level",
+            "games": {"$sum": 1},
+            "decided": {"$sum": {"$cond": [{"$ifNull": ["$winner", False]}, 1, 0]}},
+            "wins": {"$sum": {"$cond": [{"$eq": ["$winner", PLAYER_COLOR]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    return {doc["_id"]: _rates(doc["games"], doc["decided"], doc["wins"])
+            for doc in collection.aggregate(pipeline, allowDiskUse=True)}
+
+
+def average_durations(collection=game_history_collection):
+    # {poziom: średni czas gry w sekundach} — $avg pomija rekordy bez duration (None, gdy żaden go nie ma)
+    pipeline = [
+        {"$group": {"_id": "$level", "average": {"$avg": "$duration"}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return {doc["_id"]: doc["average"] for doc in collection.aggregate(pipeline, allowDiskUse=True)}
+
+
+def move_type_distribution(collection=game_history_collection, level=None):
+    # {(typ ruchu, kto): liczba}, np. ("attack", "AI") — po rozwinięciu tablicy events w bazie
+    pipeline = _level_match(level) + [
+        {"$unwind": "$events"},
+        {"$group": {"_id": {"type": "$events.type", "by": "$events.by"}, "count": {"$sum": 1}}},
+    ]
+    return {(doc["_id"]["type"], doc["_id"]["by"]): doc["count"]
+            for doc in collection.aggregate(pipeline, allowDiskUse=True)}
+
+
+def stream_matches(collection=game_history_collection, query=None, projection=SUMMARY_PROJECTION,
+                   batch_size=STREAM_BATCH_SIZE):
+    # Kursor pobierający dokumenty paczkami po batch_size — w pamięci jest tylko bieżąca paczka
+    cursor = collection.find(query or {}, projection, batch_size=batch_size)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def summarize(matches):
+    # Te same statystyki co potoki powyżej, liczone w jednym przejściu po dowolnym strumieniu rekordów
+    levels = {}
+    moves = {}
+    for match in matches:
+        stats = levels.setdefault(match.get("level"),
+                                  {"games": 0, "decided": 0, "wins": 0, "duration": 0, "timed": 0})
+        stats["games"] += 1
+        if match.get("winner") is not None:
+            stats["decided"] += 1
+            stats["wins"] += match["winner"] == PLAYER_COLOR
+        # Jak $avg: brakujący czas gry nie liczy się jako 0
+        if match.get("duration") is not None:
+            stats["duration"] += match["duration"]
+            stats["timed"] += 1
+        for event in match.get("events", ()):
+            key = (event.get("type"), event.get("by"))
+            moves[key] = moves.get(key, 0) + 1
+    return {
+        "win_rates": {level: _rates(s["games"], s["decided"], s["wins"])
+                      for level, s in sorted(levels.items(), key=lambda item: str(item[0]))},
+        "average_durations": {level: s["duration"] / s["timed"] if s["timed"] else None
+                              for level, s in sorted(levels.items(), key=lambda item: str(item[0]))},
+        "move_types": moves,
+    }
+
+
+def report(collection=game_history_collection, stream=False):
+    if stream:
+        return summarize(stream_matches(collection))
+    return {
+        "win_rates": win_rates(collection),
+        "average_durations": average_durations(collection),
+        "move_types": move_type_distribution(collection),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statystyki zapisanych gier Cell Expansion War")
+    parser.add_argument("--stream", action="store_true",
+                        help="licz lokalnie, przechodząc kursorem po wszystkich grach (zamiast agregacji w bazie)")
+    args = parser.parse_args()
+
+    ensure_indexes()
+    stats = report(stream=args.stream)
+    print("Poziom | gier | rozstrzygniętych | wygranych | % wygranych | % wśród rozstrzygniętych | średni czas [s]")
+    for level, rates in stats["win_rates"].items():
+        win_rate, decided_win_rate = ("-" if rate is None else f"{rate:.0%}"
+                                      for rate in (rates["win_rate"], rates["decided_win_rate"]))
+        average = stats["average_durations"].get(level)
+        average = "-" if average is None else f"{average:.1f}"
+        print(f"{level} | {rates['games']} | {rates['decided']} | {rates['wins']} | {win_rate} | "
+              f"{decided_win_rate} | {average}")
+    print("Ruchy:")
+    for (move_type, by), count in sorted(stats["move_types"].items(), key=lambda item: -item[1]):
+        print(f"  {move_type} ({by}): {count}")
+
+
+if __name__ == "__main__":
+    main()
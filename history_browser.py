@@ -0,0 +1,115 @@
+# Przeglądarka historii gier: tabela meczów z lokalnego magazynu (history_store.py) doczytywana
+# stronami przez canFetchMore/fetchMore — w pamięci są tylko przewinięte wpisy indeksu,
+# a pełny rekord (ruchy) wczytujemy dopiero po wybraniu meczu.
+from itertools import islice
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QPushButton, QHeaderView, QAbstractItemView
+
+PAGE_SIZE = 100
+
+
+class PagedTableModel(QAbstractTableModel):
+    # Wiersze z iteratora, po PAGE_SIZE naraz, gdy widok dojdzie do końca tabeli;
+    # row_values zamienia wiersz na krotkę wartości kolumn (w kolejności headers)
+    def __init__(self, rows, headers, row_values, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.row_values = row_values
+        self.rows = []
+        self._source = iter(rows)
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        value = self.row_values(self.rows[index.row()])[index.column()]
+        return "" if value is None else str(value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        page = list(islice(self._source, PAGE_SIZE))
+        if len(page) < PAGE_SIZE:
+            self._exhausted = True
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+
+class MatchTableModel(PagedTableModel):
+    # Wiersze to wpisy indeksu magazynu (od najnowszych) — bez czytania samych segmentów
+    def __init__(self, store, level=None, parent=None):
+        super().__init__(store.entries(level, newest_first=True), ["Data", "Poziom", "Zwycięzca"],
+                         lambda entry: (entry["date"], entry["level"], entry["winner"]), parent)
+        self.store = store
+
+    def record(self, row):
+        return self.store.read(self.rows[row])
+
+
+class EventTableModel(PagedTableModel):
+    # Ruchy wybranego meczu — są już w pamięci razem z rekordem, tabela tylko je wyświetla
+    def __init__(self, events=(), parent=None):
+        super().__init__(events, ["Czas [s]", "Typ", "Z węzła", "Do węzła", "Kto"],
+                         lambda event: (event.get("time"), event.get("type"), event.get("from"),
+                                        event.get("to"), event.get("by")), parent)
+
+
+class HistoryBrowser(QWidget):
+    def __init__(self, store, on_back=None, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        layout.addWidget(QLabel("🗂 Historia gier"))
+
+        self.matches = MatchTableModel(store, parent=self)
+        self.match_view = QTableView()
+        self.match_view.setModel(self.matches)
+        self.match_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.match_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.match_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.match_view.selectionModel().currentRowChanged.connect(self.show_match)
+        layout.addWidget(self.match_view)
+
+        self.summary = QLabel("Wybierz mecz, aby zobaczyć ruchy")
+        layout.addWidget(self.summary)
+
+        self.event_view = QTableView()
+        self.event_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.event_view.setModel(EventTableModel(parent=self))
+        layout.addWidget(self.event_view)
+
+        if on_back is not None:
+            btn_back = QPushButton("⬅ Powrót do menu")
+            btn_back.clicked.connect(on_back)
+            layout.addWidget(btn_back)
+
+    def show_match(self, current, previous=None):
+        if not current.isValid():
+            return
+        record = self.matches.record(current.row())
+        events = record.get("events", [])
+        self.summary.setText(f"{record.get('level')} — czas gry: {record.get('duration')} s, "
+                             f"zwycięzca: {record.get('winner')}, ruchów: {len(events)}")
+        old_model = self.event_view.model()
+        self.event_view.setModel(EventTableModel(events, parent=self))
+        if old_model is not None:
+            old_model.deleteLater()
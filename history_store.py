@@ -0,0 +1,126 @@
+# Lokalny magazyn historii gier: rekordy dopisywane jako zwarty NDJSON (jedna gra = jedna linia)
+# do segmentów, które po przekroczeniu rozmiaru są zamykane i (opcjonalnie) kompresowane gzipem.
+# Mały plik indeksu (też NDJSON) trzyma segment, przesunięcie, poziom, datę i zwycięzcę każdej gry.
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+
+HISTORY_DIR = "historia"
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+INDEX_FILE = "index.ndjson"
+READ_BLOCK = 64 * 1024
+
+
+def _segment_name(number, compressed=False):
+    return f"segment-{number:06d}.ndjson" + (".gz" if compressed else "")
+
+
+class HistoryStore:
+    def __init__(self, directory=HISTORY_DIR, max_segment_bytes=SEGMENT_MAX_BYTES, compress=True):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.segment = None  # numer aktywnego segmentu, ustalany przy pierwszym zapisie
+
+    def _path(self, number, compressed=False):
+        return os.path.join(self.directory, _segment_name(number, compressed))
+
+    def _active_segment(self):
+        if self.segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            numbers = [int(name[8:14]) for name in os.listdir(self.directory) if name.startswith("segment-")]
+            self.segment = max(numbers, default=1)
+            if os.path.exists(self._path(self.segment, compressed=True)):
+                self.segment += 1  # ostatni segment już zamknięty
+        return self.segment
+
+    def append(self, record):
+        # O(1): jedna linia do segmentu i jedna do indeksu, bez przepisywania plików
+        record = dict(record)
+        record.setdefault("date", time.strftime("%Y-%m-%dT%H:%M:%S"))
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode()
+        with self.lock:
+            segment = self._active_segment()
+            path = self._path(segment)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size and size + len(line) > self.max_segment_bytes:
+                self._rotate()
+                segment, path, size = self.segment, self._path(self.segment), 0
+            with open(path, "ab") as f:
+                f.write(line)
+            entry = {"segment": segment, "offset": size, "length": len(line), "level": record.get("level"),
+                     "date": record["date"], "winner": record.get("winner")}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return entry
+
+    def _rotate(self):
+        closed = self.segment
+        self.segment += 1
+        if self.compress:
+            path = self._path(closed)
+            with open(path, "rb") as src, gzip.open(self._path(closed, compressed=True), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+
+    def _index_lines(self):
+        with open(self.index_path, "rb") as f:
+            yield from f
+
+    def _index_lines_reversed(self):
+        # Indeks czytany od końca blokami — najnowsze gry bez wczytywania całego pliku
+        with open(self.index_path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0:
+                step = min(READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + tail).split(b"\n")
+                tail = lines.pop(0)  # może być urwana — dokleimy ją do następnego bloku
+                yield from reversed(lines)
+            yield tail
+
+    def entries(self, level=None, since=None, until=None, newest_first=False):
+        # Wpisy indeksu; since/until to daty w formacie ISO, porównywane jako tekst
+        if not os.path.exists(self.index_path):
+            return
+        lines = self._index_lines_reversed() if newest_first else self._index_lines()
+        for line in lines:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if level is not None and entry["level"] != level:
+                continue
+            if since is not None and entry["date"] < since:
+                continue
+            if until is not None and entry["date"] > until:
+                continue
+            yield entry
+
+    def read(self, entry):
+        # Jeden rekord po wpisie indeksu — seek w zwykłym segmencie, w skompresowanym gzip przewija strumień
+        path = self._path(entry["segment"])
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                f.seek(entry["offset"])
+                return json.loads(f.read(entry["length"]))
+        with gzip.open(self._path(entry["segment"], compressed=True), "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def records(self, level=None, since=None, until=None):
+        for entry in self.entries(level, since, until):
+            yield self.read(entry)
+
+    def latest(self, level=None):
+        entry = next(self.entries(level, newest_first=True), None)
+        return self.read(entry) if entry is not None else None
+
+
+history_store = HistoryStore()
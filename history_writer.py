@@ -0,0 +1,107 @@
+# Zapis historii gier w tle: GameView oddaje gotowy rekord meczu, a zapis do XML, MongoDB i JSON
+# idzie równolegle w wątkach roboczych — ekran końca gry nie czeka na dysk ani na bazę.
+import queue
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from history_store import history_store
+from mongo_writer import mongo_writer
+
+MAX_PENDING = 32  # ile rekordów może czekać na zapis; przy przepełnieniu odrzucamy najstarszy
+RETRY_ATTEMPTS = 3
+RETRY_DELAY = 0.5  # sekundy, podwajane przy każdej kolejnej próbie
+
+
+def write_xml(record):
+    root = ET.Element("game", level=record["level"], duration=str(record["duration"]))
+    for node in record["nodes"]:
+        ET.SubElement(root, "node", {key: str(value) for key, value in node.items()})
+    for event in record["events"]:
+        ET.SubElement(root, "event", {key: str(value) for key, value in event.items()})
+    filename = f"historia_{record['level']}.xml"
+    ET.ElementTree(root).write(filename, encoding="utf-8", xml_declaration=True)
+    print(f"✅ Zapisano historię do pliku: {filename}")
+
+
+def write_mongo(record):
+    # Paczki insert_many z zapasowym plikiem, gdy baza nie odpowiada (mongo_writer.py)
+    mongo_writer.add(record)
+
+
+def write_local(record):
+    # Dopisanie do lokalnego magazynu NDJSON (history_store.py) zamiast nadpisywania historia.json
+    entry = history_store.append(record)
+    print(f"✅ Zapisano historię lokalnie (segment {entry['segment']})")
+
+
+DEFAULT_SINKS = [write_xml, write_mongo, write_local]
+
+
+class HistoryWriter:
+    def __init__(self, sinks=None, max_pending=MAX_PENDING, retries=RETRY_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self.sinks = list(DEFAULT_SINKS if sinks is None else sinks)
+        self.pending = queue.Queue(max_pending)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, record):
+        # Nie blokuje: rekord trafia do kolejki, wątek zapisu startuje przy pierwszym użyciu
+        self._ensure_started()
+        while True:
+            try:
+                self.pending.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.pending.get_nowait()
+                    self.pending.task_done()
+                    print(f"[HISTORIA] Kolejka zapisu pełna — pominięto grę na poziomie {dropped['level']}")
+                except queue.Empty:
+                    pass
+
+    def flush(self):
+        # Czeka, aż wszystkie przyjęte rekordy zostaną zapisane (albo zawiodą po ponowieniach)
+        if self.thread is not None:
+            self.pending.join()
+
+    def shutdown(self):
+        if self.thread is None:
+            return
+        self.pending.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=len(self.sinks) or 1) as executor:
+            while True:
+                record = self.pending.get()
+                if record is None:
+                    self.pending.task_done()
+                    return
+                # Wszystkie miejsca zapisu naraz — wolna baza nie opóźnia plików
+                list(executor.map(lambda sink: self._write_with_retry(sink, record), self.sinks))
+                self.pending.task_done()
+
+    def _write_with_retry(self, sink, record):
+        for attempt in range(self.retries):
+            try:
+                sink(record)
+                return True
+            except Exception as e:
+                print(f"[HISTORIA] {sink.__name__}: próba {attempt + 1}/{self.retries} nieudana: {e}")
+                if attempt + 1 < self.retries:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        return False
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,145 @@
+# Tryb lockstep dla gry sieciowej (bez Qt): obaj gracze liczą tę samą symulację krok po kroku
+# i wymieniają tylko ruchy oznaczone numerem ticku — ruch ze sieci nie zależy od liczby jednostek.
+import struct
+import zlib
+
+import wire
+
+LOCKSTEP_TICK = 1 / 32  # stały krok; dokładnie reprezentowalny w binarnym float
+INPUT_DELAY = 4  # ruch wykonany na ticku T jest stosowany na T + INPUT_DELAY (~125 ms na dotarcie do przeciwnika)
+CHECKSUM_INTERVAL = 32  # suma kontrolna co sekundę gry
+MAX_CATCH_UP = 8  # ile ticków naraz nadrabiamy po zatrzymaniu
+RESEND_INTERVAL = 0.25  # s — READY przed startem; ramki tylko wtedy, gdy przez tyle nie przyszło nowe potwierdzenie
+
+
+def state_checksum(simulation, tick):
+    # CRC32 z całkowitoliczbowej części stanu: właściciele, jednostki, połączenia, jednostki w locie
+    values = [tick, len(simulation.units), simulation.units.next_id]
+    for node in simulation.nodes:
+        values += [wire.COLORS.index(node.color_name), node.unit_count, node.current_connections]
+    for connection in simulation.connections:
+        values += [connection.source.id, connection.target.id]
+    return zlib.crc32(struct.pack(f"!{len(values)}I", *values))
+
+
+class LockstepSession:
+    # apply_move(kolor, id źródła, id celu) wykonuje ruch (w GameView przez perform_connection),
+    # send(bytes) wysyła wiadomość do przeciwnika
+    def __init__(self, simulation, local_color, remote_color, send, apply_move,
+                 input_delay=INPUT_DELAY, checksum_interval=CHECKSUM_INTERVAL):
+        self.simulation = simulation
+        self.local_color = local_color
+        self.remote_color = remote_color
+        self.send = send
+        self.apply_move = apply_move
+        self.input_delay = input_delay
+        self.checksum_interval = checksum_interval
+        self.tick = 0
+        self.accumulator = 0.0
+        self.pending = []  # nasze ruchy czekające na przypisanie do ticku
+        # kolor -> {tick: [(id źródła, id celu)]}; pierwsze input_delay ticków są puste u obu graczy
+        self.frames = {color: {t: [] for t in range(input_delay)} for color in (local_color, remote_color)}
+        self.local_checksums = {}
+        self.remote_checksums = {}
+        self.desync_tick = None
+
+        # Start: tick 0 dopiero, gdy obie strony wymieniły READY (przeciwnik mógł jeszcze nie otworzyć gry)
+        self.started = False
+        self.remote_ready = False  # mamy READY przeciwnika
+        self.remote_saw_us = False  # przeciwnik ma nasze READY
+        # Nasze ramki czekające na potwierdzenie (ack w ramkach przeciwnika) — ponawiane, gdy potwierdzenia stoją
+        self.unacked = {}
+        self.remote_next = input_delay  # najmniejszy tick przeciwnika, którego ramki jeszcze nie mamy
+        self.resend_elapsed = RESEND_INTERVAL
+
+    def queue_move(self, from_id, to_id):
+        self.pending.append((from_id, to_id))
+
+    def receive(self, message):
+        # True, gdy dotarła nowa ramka ruchów przeciwnika (powtórzenia ponawianych ramek są pomijane)
+        if message["action"] == "lockstep_ready":
+            self.remote_ready = True
+            self.remote_saw_us = self.remote_saw_us or message["seen"]
+            self.started = self.started or self.remote_saw_us
+            if not message["started"]:
+                # Przeciwnik jeszcze czeka — odpowiadamy, żeby wiedział, że mamy jego READY
+                self.send(wire.encode_lockstep_ready(True, self.started))
+        elif message["action"] == "lockstep_input":
+            acked = [tick for tick in self.unacked if tick < message["ack"]]
+            for tick in acked:
+                del self.unacked[tick]
+            if acked:
+                self.resend_elapsed = 0.0
+            frames = self.frames[self.remote_color]
+            if message["tick"] < self.tick or message["tick"] in frames:
+                return False
+            frames[message["tick"]] = message["moves"]
+            while self.remote_next in frames or self.remote_next < self.tick:
+                self.remote_next += 1
+            return True
+        elif message["action"] == "lockstep_checksum":
+            self.remote_checksums[message["tick"]] = message["checksum"]
+            self._compare_checksums(message["tick"])
+        return False
+
+    def is_waiting(self):
+        return not self.started or self.tick not in self.frames[self.remote_color]
+
+    def advance(self, elapsed):
+        # Wykonuje tyle stałych ticków, ile się zmieściło w elapsed i na ile pozwalają ruchy przeciwnika;
+        # zwraca zdarzenia symulacji jak Simulation.step
+        self.resend_elapsed += elapsed
+        if self.resend_elapsed >= RESEND_INTERVAL:
+            self.resend_elapsed = 0.0
+            self._resend()
+        if not self.started:
+            return []
+        self.accumulator = min(self.accumulator + elapsed, MAX_CATCH_UP * LOCKSTEP_TICK)
+        events = []
+        while self.accumulator >= LOCKSTEP_TICK:
+            self._send_local_frame()
+            if self.is_waiting():
+                break
+            self._run_tick(events)
+            self.accumulator -= LOCKSTEP_TICK
+        return events
+
+    def _send_local_frame(self):
+        # Każdy tick wysyłamy ramkę (także pustą), żeby przeciwnik wiedział, że może iść dalej
+        frame_tick = self.tick + self.input_delay
+        if frame_tick in self.frames[self.local_color]:
+            return
+        moves, self.pending = self.pending[:255], self.pending[255:]
+        self.frames[self.local_color][frame_tick] = moves
+        self.unacked[frame_tick] = moves
+        self.send(wire.encode_lockstep_input(frame_tick, moves, self.remote_next))
+
+    def _resend(self):
+        if not self.started:
+            self.send(wire.encode_lockstep_ready(self.remote_ready))
+            return
+        for tick in sorted(self.unacked):
+            self.send(wire.encode_lockstep_input(tick, self.unacked[tick], self.remote_next))
+
+    def _run_tick(self, events):
+        # Kolejność ruchów zależy tylko od koloru, nie od tego, kto je wysłał
+        for color in sorted(self.frames):
+            for from_id, to_id in self.frames[color].pop(self.tick):
+                nodes = self.simulation.nodes
+                if max(from_id, to_id) < len(nodes) and nodes[from_id].color_name == color:
+                    self.apply_move(color, from_id, to_id)
+        events.extend(self.simulation.step(LOCKSTEP_TICK))
+        self.tick += 1
+
+        if self.tick % self.checksum_interval == 0:
+            checksum = state_checksum(self.simulation, self.tick)
+            self.local_checksums[self.tick] = checksum
+            self.send(wire.encode_lockstep_checksum(self.tick, checksum))
+            self._compare_checksums(self.tick)
+
+    def _compare_checksums(self, tick):
+        if tick not in self.local_checksums or tick not in self.remote_checksums:
+            return
+        if self.local_checksums.pop(tick) != self.remote_checksums.pop(tick) and self.desync_tick is None:
+            self.desync_tick = tick
+            print(f"[LOCKSTEP] Rozsynchronizowanie stanu na ticku {tick}")
@@ -1,10 +1,22 @@
+import asyncio
 import sys
 import resources_rc
 from PyQt5.QtWidgets import QApplication
+from qasync import QEventLoop
 from main_window import MainWindow
+from history_writer import history_writer
+from mongo_writer import mongo_writer
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    # Jedna pętla zdarzeń dla Qt i asyncio (sieć bez blokujących wątków)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    with loop:
+        exit_code = loop.run_forever()
+    # Dokończ zapis historii ostatniej gry przed wyjściem
+    history_writer.shutdown()
+    mongo_writer.close()
+    sys.exit(exit_code)
\ No newline at end of file
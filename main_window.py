@@ -1,10 +1,11 @@
-import threading
+import asyncio
 
 from PyQt5.QtCore import Qt, QRegExp, QTimer
 from PyQt5.QtGui import QPixmap, QRegExpValidator
 from PyQt5.QtWidgets import QLabel, QWidget, QVBoxLayout, QMainWindow, QPushButton, QButtonGroup, QRadioButton, \
-    QHBoxLayout, QLineEdit, QTextEdit, QMessageBox
+    QHBoxLayout, QLineEdit, QTextEdit, QMessageBox, QCheckBox
 from pymongo import MongoClient
+import glob
 import json
 import os
 from game_view import GameView
@@ -12,11 +13,11 @@ from levels import LEVELS
 from mongo_client import game_history_collection
 
 from turn_manager import TurnManager
-import server
-import client
-from server import start_server
-from client import connect_to_server
+from network import AsyncNetwork
 from network_turn_manager import NetworkTurnManager
+from replay import REPLAY_DIR
+from history_store import history_store
+from history_browser import HistoryBrowser
 
 
 
@@ -55,7 +56,14 @@ class MainWindow(QMainWindow):
 
         self.statusBar().showMessage(f"Tura gracza {player_color.upper()} — Tura {turn_number}")
 
+    def close_game_view(self):
+        # Porzucany widok gry (Restart, Menu, inna gra) musi zwolnić timery, pule AI i plik powtórki
+        if hasattr(self, "game_view"):
+            self.game_view.teardown()
+            del self.game_view
+
     def show_level_selector(self):
+        self.close_game_view()
         widget = QWidget()
         layout = QHBoxLayout()
         layout.setContentsMargins(30, 30, 30, 30)
@@ -102,17 +110,30 @@ class MainWindow(QMainWindow):
         mode_container_layout.addWidget(self.mode_local)
         mode_container_layout.addWidget(self.mode_online)
 
+        # Przeciwnik z przeszukiwaniem (Monte Carlo) zamiast heurystyki — tylko dla 1 gracza
+        self.search_ai_checkbox = QCheckBox("Trudne AI 🧠")
+        self.search_ai_checkbox.setStyleSheet("QCheckBox { font-size: 16px; color: #2e2e2e; }")
+        mode_container_layout.addWidget(self.search_ai_checkbox)
+
+        # Gra sieciowa w trybie lockstep (wymiana samych ruchów) zamiast migawek stanu od hosta
+        self.lockstep_checkbox = QCheckBox("Lockstep")
+        self.lockstep_checkbox.setStyleSheet("QCheckBox { font-size: 16px; color: #2e2e2e; }")
+
         self.ip_input = IPPortInput()
 
         # Wybór roli: serwer czy klient
         self.role_radio_server = QRadioButton("Serwer")
         self.role_radio_client = QRadioButton("Klient")
+        # Klient serwera dedykowanego (dedicated_server.py): lobby dobiera przeciwnika na ten sam poziom
+        self.role_radio_dedicated = QRadioButton("Serwer dedykowany")
         self.role_radio_server.setChecked(True)
 
         mode_container_layout.addWidget(self.role_radio_server)
         mode_container_layout.addWidget(self.role_radio_client)
+        mode_container_layout.addWidget(self.role_radio_dedicated)
 
         mode_container_layout.addWidget(self.ip_input)
+        mode_container_layout.addWidget(self.lockstep_checkbox)
 
 
 
@@ -155,11 +176,21 @@ class MainWindow(QMainWindow):
         btn_json.setStyleSheet(button_style)
         btn_json.clicked.connect(self.show_history_json)
 
+        btn_browser = QPushButton("\U0001F5C2 Przeglądaj historię gier")
+        btn_browser.setStyleSheet(button_style)
+        btn_browser.clicked.connect(self.show_history_browser)
+
+        btn_replay = QPushButton("\U0001F3AC Odtwórz ostatnią powtórkę")
+        btn_replay.setStyleSheet(button_style)
+        btn_replay.clicked.connect(self.play_last_replay)
+
         history_buttons = QVBoxLayout()
         history_buttons.setSpacing(8)
         history_buttons.addWidget(btn_show_xml)
         history_buttons.addWidget(btn_nosql)
         history_buttons.addWidget(btn_json)
+        history_buttons.addWidget(btn_browser)
+        history_buttons.addWidget(btn_replay)
 
         history_widget = QWidget()
         history_widget.setLayout(history_buttons)
@@ -212,27 +243,35 @@ class MainWindow(QMainWindow):
 
         if self.role_radio_server.isChecked():
             self.player_type = "server"
-            threading.Thread(target=start_server, args=(port,), daemon=True).start()
-            import server
-            self.network = server
-
-
-
+        elif self.role_radio_dedicated.isChecked():
+            self.player_type = "dedicated"
         else:
             self.player_type = "client"
-            try:
-                import client
-                client.connect_to_server(ip, port)
-                self.network = client
+        self.open_network(ip, port, notify=True)
 
-                # Wysyłka testowej wiadomości
-                self.network.send_test_message()
+    def open_network(self, ip, port, notify=False):
+        # Połączenie działa w pętli asyncio (qasync) — okno nie czeka na accept()/connect()
+        if getattr(self, "network", None) is not None:
+            return self.network
 
-            except Exception as e:
-                QMessageBox.critical(self, "Błąd połączenia", f"Nie udało się połączyć: {e}")
+        self.network = AsyncNetwork()
+        if self.player_type == "server":
+            task = asyncio.ensure_future(self.network.listen(port))
+        else:
+            task = asyncio.ensure_future(self.network.connect(ip, port))
+
+        def on_done(future):
+            if future.cancelled():
                 return
+            error = future.exception()
+            if error:
+                self.network = None
+                QMessageBox.critical(self, "Błąd połączenia", f"Nie udało się połączyć: {error}")
+            elif notify:
+                QMessageBox.information(self, "Sukces", "Połączono! Teraz wybierz poziom gry.")
 
-        QMessageBox.information(self, "Sukces", "Połączono! Teraz wybierz poziom gry.")
+        task.add_done_callback(on_done)
+        return self.network
 
     def show_history_xml(self):
         self._display_text_history(f"historia_{self.last_level_name}.xml", "📖 Historia gry")
@@ -246,14 +285,30 @@ class MainWindow(QMainWindow):
             self._display_text_history(text=f"Błąd: {e}", title="☁ Historia z MongoDB")
 
     def show_history_json(self):
-        if not os.path.exists("historia.json"):
-            self._display_text_history(text="Nie znaleziono pliku historia.json", title="📝 Historia gry (JSON)")
+        # Ostatnia gra z lokalnego magazynu (history_store.py)
+        content = history_store.latest()
+        if content is None:
+            self._display_text_history(text="Brak zapisanych gier", title="📝 Historia gry (JSON)")
             return
-        with open("historia.json", "r", encoding="utf-8") as f:
-            content = json.load(f)
         pretty = json.dumps(content, indent=4, ensure_ascii=False)
         self._display_text_history(text=pretty, title="📝 Historia gry (JSON)")
 
+    def show_history_browser(self):
+        # Tabela wszystkich zapisanych gier, doczytywana stronami w trakcie przewijania
+        self.close_game_view()
+        self.setCentralWidget(HistoryBrowser(history_store, on_back=self.show_level_selector))
+
+    def play_last_replay(self):
+        # Najnowszy plik z replays/ — klawisze 1/2/3 zmieniają tempo, strzałki przewijają o 10 s
+        replays = glob.glob(os.path.join(REPLAY_DIR, "*.cewr"))
+        if not replays:
+            QMessageBox.information(self, "Powtórka", "Brak zapisanych powtórek.")
+            return
+        self.close_game_view()
+        self.game_view = GameView([], "", self, mode="replay")
+        self.game_view.load_game_history(max(replays, key=os.path.getmtime))
+        self.setCentralWidget(self.game_view)
+
     def _display_text_history(self, filename=None, text=None, title="Historia"):
         container = QWidget()
         layout = QVBoxLayout()
@@ -282,10 +337,12 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(container)
 
     def start_game(self, level_name):
+        self.close_game_view()
 
         if self.selected_game_mode == "1 gracz":
             level_data = LEVELS[level_name]
-            self.game_view = GameView(level_data, level_name, self, mode="single")
+            ai_mode = "search" if self.search_ai_checkbox.isChecked() else "greedy"
+            self.game_view = GameView(level_data, level_name, self, mode="single", ai_mode=ai_mode)
             self.last_level_name = level_name
             self.setCentralWidget(self.game_view)
         elif self.selected_game_mode == "2 graczy lokalnie":
@@ -315,46 +372,67 @@ class MainWindow(QMainWindow):
             port = int(port)
             if self.role_radio_server.isChecked():
                 self.player_type = "server"
+            elif self.role_radio_dedicated.isChecked():
+                self.player_type = "dedicated"
             else:
                 self.player_type = "client"
-            # start połączenia
-            if self.player_type == "server":
-                threading.Thread(target=start_server, args=(port,), daemon=True).start()
-                self.network = server
-            else:
-                self.network = client
+            # start połączenia (albo użycie już otwartego)
+            network = self.open_network(ip, port)
             level_data = LEVELS[level_name]
             self.game_view = GameView(level_data, level_name, self, mode="network")
             self.last_level_name = level_name
             self.setCentralWidget(self.game_view)
             is_host = self.player_type == "server"
 
-            class NetworkWrapper:
-                def __init__(self, network_module):
-                    self.network = network_module
-
-                def send(self, data):
-                    self.network.send_data(data)
-
-                def receive_data(self):
-                    return self.network.receive_data()
-
-            self.turn_manager = NetworkTurnManager(NetworkWrapper(self.network), is_host)
+            if isinstance(getattr(self, "turn_manager", None), NetworkTurnManager):
+                self.turn_manager.stop()
+            dedicated = self.player_type == "dedicated"
+            # Pokój na serwerze dedykowanym sam liczy symulację i wysyła migawki — bez lockstep
+            lockstep = self.lockstep_checkbox.isChecked() and not dedicated
+            self.turn_manager = NetworkTurnManager(network, is_host, lockstep=lockstep)
             self.turn_manager.turn_changed.connect(self.on_turn_changed)
-            self.turn_manager.remote_move_received.connect(self.apply_opponent_move)
+            self.turn_manager.handshake_failed.connect(
+                lambda message: QMessageBox.critical(self, "Błąd połączenia", message))
+            if lockstep:
+                session = self.game_view.start_lockstep(self.turn_manager.my_color, network.send)
+                self.turn_manager.attach_lockstep(session)
+            else:
+                self.turn_manager.remote_move_received.connect(self.apply_opponent_move)
+                self.turn_manager.attach_simulation(self.game_view.simulation)
+                self.turn_manager.snapshot_received.connect(self.game_view.apply_snapshot)
+
+            if dedicated:
+                # Tura zaczyna się dopiero, gdy lobby znajdzie przeciwnika (MATCHED)
+                self.turn_manager.matched.connect(self.on_matched)
+                self.turn_manager.match_ended.connect(self.on_match_ended)
+                self.turn_manager.join(level_name)
+                self.statusBar().showMessage(f"Czekanie na przeciwnika ({level_name})...")
+                return
 
             QTimer.singleShot(0, self.turn_manager.start)
 
+    def on_matched(self, color, level_name):
+        self.statusBar().showMessage(f"Znaleziono przeciwnika — grasz kolorem {color.upper()}")
+        self.turn_manager.start()
+
+    def on_match_ended(self, reason, winner):
+        if reason == "opponent_left":
+            self.statusBar().showMessage("Przeciwnik opuścił grę")
+        elif reason == "timeout":
+            self.statusBar().showMessage("Koniec meczu — skończył się czas")
+        else:
+            self.statusBar().showMessage(f"Koniec meczu — wygrywa {winner.upper()}")
+
     def apply_opponent_move(self, move_data):
         print(f"[APPLY] Ruch przeciwnika: {move_data}")
-        from_pos = move_data.get("from")
-        to_pos = move_data.get("to")
-        if not (from_pos and to_pos):
+        from_id = move_data.get("from")
+        to_id = move_data.get("to")
+        if from_id is None or to_id is None:
             print(f"[ERROR] Niepełne dane ruchu: {move_data}")
             return
 
         if hasattr(self, 'game_view'):
-            QTimer.singleShot(0, lambda: self.game_view.perform_connection(from_pos, to_pos, triggered_by_network=True))
+            QTimer.singleShot(0, lambda: self.game_view.perform_connection(from_id, to_id, triggered_by_network=True))
 
 
 class IPPortInput(QWidget):
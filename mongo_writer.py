@@ -0,0 +1,134 @@
+# Zbiorczy zapis historii do MongoDB: rekordy czekają w buforze i idą jednym insert_many
+# (po BATCH_SIZE rekordach albo co FLUSH_INTERVAL). Gdy baza jest niedostępna, paczka trafia
+# do lokalnego pliku (NDJSON), który jest odtwarzany w bazie po ponownym połączeniu.
+import os
+import threading
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+from mongo_client import game_history_collection
+
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 2.0  # sekundy
+SPILL_FILE = "historia_mongo_spill.ndjson"
+DUPLICATE_KEY = 11000
+
+
+class BatchedMongoWriter:
+    def __init__(self, collection=game_history_collection, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, spill_path=SPILL_FILE):
+        self.collection = collection  # jeden MongoClient (z pulą połączeń) z mongo_client.py
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.buffer = []
+        self.lock = threading.Lock()  # bufor
+        self.write_lock = threading.Lock()  # zapis do bazy i pliku zapasowego
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __call__(self, record):
+        # Sink dla history_writer.HistoryWriter — nie czeka na bazę, chyba że paczka jest pełna
+        self.add(record)
+
+    def add(self, record):
+        # Własne _id nadane przed pierwszą próbą — ponowny zapis z pliku nie zdubluje gry
+        document = dict(record)
+        document.setdefault("_id", ObjectId())
+        self._ensure_started()
+        with self.lock:
+            self.buffer.append(document)
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        with self.write_lock:
+            if os.path.exists(self.spill_path) and not self._replay_spill():
+                self._spill(batch)
+                return
+            if batch and not self._insert(batch):
+                self._spill(batch)
+
+    def close(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None:
+                self.stopped.clear()
+                self.thread = threading.Thread(target=self._run, name="mongo-writer", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        # Próg czasowy: co flush_interval wysyłamy to, co się zebrało, i ponawiamy zaległy plik
+        while not self.stopped.wait(self.flush_interval):
+            with self.lock:
+                pending = bool(self.buffer)
+            if pending or os.path.exists(self.spill_path):
+                # Błąd jednego zapisu nie może zatrzymać wątku — następna próba za flush_interval
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[MongoDB] Błąd zapisu historii w tle: {e}")
+
+    def _insert(self, documents):
+        # True, gdy paczka jest w bazie (duplikaty _id z wcześniejszej, przerwanej próby też się liczą)
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+            for err in errors:
+                print(f"[MongoDB] Odrzucony rekord historii: {err.get('errmsg')}")
+        except ConnectionFailure as e:
+            print(f"[MongoDB] Baza niedostępna, zapis do {self.spill_path}: {e}")
+            return False
+        except PyMongoError as e:
+            # Np. OperationFailure (uprawnienia, limit) — paczka czeka w pliku na kolejną próbę
+            print(f"[MongoDB] Błąd zapisu, zapis do {self.spill_path}: {e}")
+            return False
+        print(f"✅ Zapisano {len(documents)} historii gier do MongoDB.")
+        return True
+
+    def _spill(self, documents):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for document in documents:
+                f.write(json_util.dumps(document) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spill(self):
+        documents, bad_lines = [], []
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    documents.append(json_util.loads(line))
+                except ValueError:
+                    bad_lines.append(line)
+        if bad_lines:
+            # Uszkodzone linie (np. urwany zapis) odkładamy osobno, żeby nie blokowały reszty pliku
+            with open(self.spill_path + ".bad", "a", encoding="utf-8") as f:
+                f.writelines(line if line.endswith("\n") else line + "\n" for line in bad_lines)
+            print(f"[MongoDB] Pominięto {len(bad_lines)} uszkodzonych linii, przeniesiono do {self.spill_path}.bad")
+        for start in range(0, len(documents), self.batch_size):
+            if not self._insert(documents[start:start + self.batch_size]):
+                # Zostawiamy tylko to, co jeszcze nie trafiło do bazy
+                with open(self.spill_path, "w", encoding="utf-8") as f:
+                    for document in documents[start:]:
+                        f.write(json_util.dumps(document) + "\n")
+                return False
+        os.remove(self.spill_path)
+        print(f"[MongoDB] Odtworzono {len(documents)} zaległych historii z {self.spill_path}")
+        return True
+
+
+mongo_writer = BatchedMongoWriter()
@@ -0,0 +1,96 @@
+import asyncio
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from client import connect_to_server
+from server import start_server
+
+
+class AsyncNetwork(QObject):
+    # Sieć na asyncio działającym w pętli zdarzeń Qt (qasync) — sygnały przychodzą od razu w wątku GUI
+    connected = pyqtSignal(object)  # FramedProtocol
+    disconnected = pyqtSignal(object)
+    message_received = pyqtSignal(object, bytes)  # FramedProtocol, treść
+
+    def __init__(self, reconnect=True, reconnect_delay=2.0):
+        super().__init__()
+        self.peers = []
+        self.server = None
+        self.remote = None  # (ip, port) po stronie klienta, do ponownego łączenia
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.closing = False
+        self.held = []  # (FramedProtocol, treść) odebrane, zanim ktokolwiek podłączył message_received
+
+    async def listen(self, port):
+        self.server = await start_server(self, port)
+
+    async def connect(self, ip, port, timeout=5.0, retries=3):
+        self.remote = (ip, port)
+        return await connect_to_server(self, ip, port, timeout=timeout, retries=retries)
+
+    def on_connected(self, peer):
+        self.peers.append(peer)
+        print(f"[NETWORK] Połączono z: {peer.address}")
+        self.connected.emit(peer)
+
+    def on_message(self, peer, message):
+        # Bez odbiorcy (przeciwnik nie otworzył jeszcze widoku gry) wiadomość czeka, a dalsze bajty
+        # zostają w gnieździe — jak u dawnego wątku odbiorczego, który jeszcze nie wystartował
+        if not self.receivers(self.message_received):
+            self.held.append((peer, message))
+            peer.pause()
+            return
+        self.message_received.emit(peer, message)
+
+    def connectNotify(self, signal):
+        super().connectNotify(signal)
+        if bytes(signal.name()) == b"message_received":
+            # Po powrocie z connect() — odbiorca jest już w pełni podłączony
+            QTimer.singleShot(0, self.release_held)
+
+    def release_held(self):
+        if not self.receivers(self.message_received):
+            return
+        held, self.held = self.held, []
+        for peer, message in held:
+            self.message_received.emit(peer, message)
+        for peer in list(self.peers):
+            if peer.paused:
+                peer.resume()
+
+    def on_disconnected(self, peer):
+        if peer in self.peers:
+            self.peers.remove(peer)
+        self.held = [(held_peer, message) for held_peer, message in self.held if held_peer is not peer]
+        print(f"[NETWORK] Rozłączono: {peer.address}")
+        self.disconnected.emit(peer)
+        if self.remote and self.reconnect and not self.closing:
+            asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        await asyncio.sleep(self.reconnect_delay)
+        try:
+            await self.connect(*self.remote)
+        except ConnectionError as e:
+            print(f"[NETWORK] Nie udało się połączyć ponownie: {e}")
+
+    def send(self, data: bytes):
+        if not self.peers:
+            print("[ERROR] Próba wysłania danych bez połączenia!")
+        for peer in self.peers:
+            peer.send(data)
+
+    def send_batch(self, messages):
+        if not self.peers:
+            print("[ERROR] Próba wysłania danych bez połączenia!")
+        for peer in self.peers:
+            peer.send_batch(messages)
+
+    def close(self):
+        self.closing = True
+        for peer in list(self.peers):
+            peer.close()
+        if self.server:
+            self.server.close()
+            self.server = None
@@ -1,29 +1,99 @@
 from PyQt5.QtCore import QTimer, pyqtSignal, QObject
-import json
-import threading
-from PyQt5.QtCore import QMetaObject, Q_ARG, Qt
-from PyQt5.QtCore import pyqtSlot
+import wire
+from state_sync import SnapshotSender, SnapshotReceiver, SNAPSHOT_INTERVAL
+
+HELLO_TIMEOUT = 5000  # ms — tyle czekamy na HELLO przeciwnika, zanim zgłosimy błąd
 
 class NetworkTurnManager(QObject):
     turn_changed = pyqtSignal(str, int)  # color, turn number
-    remote_move_received = pyqtSignal(dict)  # {"from": [x, y], "to": [x, y]}
+    remote_move_received = pyqtSignal(dict)  # {"action": "connect", "from": id węzła, "to": id węzła}
+    snapshot_received = pyqtSignal(object)  # state_sync.BoardState od hosta
+    matched = pyqtSignal(str, str)  # kolor, poziom — serwer dedykowany znalazł przeciwnika
+    match_ended = pyqtSignal(str, str)  # powód ("winner", "timeout", "opponent_left"), zwycięzca albo ""
+    handshake_failed = pyqtSignal(str)  # opis błędu uzgadniania wersji
 
-    def __init__(self, network, is_host, duration=10000):
+    def __init__(self, network, is_host, duration=10000, lockstep=False):
         super().__init__()
         self.players = ["green", "red"]
         self.is_host = is_host
         self.my_color = "green" if is_host else "red"
-        self.network = network  # instance of Server or Client
+        self.network = network  # network.AsyncNetwork
         self.turn_timer = QTimer()
         self.turn_timer.setInterval(duration)
         self.turn_timer.timeout.connect(self.end_turn_by_timer)
         self.turn_number = 1
         self.turn_active = False
-        self.lock = threading.Lock()
 
-        threading.Thread(target=self.listen_for_moves, daemon=True).start()
+        # Wiadomości przychodzą sygnałem w wątku GUI — bez wątku blokującego na odbiorze
+        self.network.message_received.connect(self.on_message)
+
+        # Host jest autorytatywny: co SNAPSHOT_INTERVAL wysyła różnicę stanu planszy.
+        # W trybie lockstep migawek nie ma — obie strony liczą to samo z tych samych ruchów
+        self.lockstep = lockstep
+        self.lockstep_session = None
+        self.simulation = None
+        self.snapshot_sender = SnapshotSender()
+        self.snapshot_receiver = SnapshotReceiver()
+        self.snapshot_timer = QTimer()
+        self.snapshot_timer.setInterval(int(SNAPSHOT_INTERVAL * 1000))
+        self.snapshot_timer.timeout.connect(self.send_snapshot)
+
+        # Uzgodnienie wersji: każda strona wysyła HELLO po połączeniu; do zgodnego HELLO przeciwnika
+        # wiadomości gry czekają w before_hello (nic nie trafia do planszy od nieznanej wersji)
+        self.peer_version = None
+        self.before_hello = []
+        self.hello_timer = QTimer()
+        self.hello_timer.setSingleShot(True)
+        self.hello_timer.setInterval(HELLO_TIMEOUT)
+        self.hello_timer.timeout.connect(self.on_hello_timeout)
+        self.network.connected.connect(self.on_connected)
+        if self.network.peers:
+            self.network.send(wire.encode_hello())
+            self.hello_timer.start()
+
+        # Serwer dedykowany: poziom, na który czekamy w lobby (JOIN), aż przyjdzie MATCHED
+        self.join_level = None
+        self.room_id = None
+
+    def on_connected(self, peer):
+        # Nowe połączenie (też po ponownym) zaczyna migawki od zera
+        self.snapshot_sender = SnapshotSender()
+        self.snapshot_receiver = SnapshotReceiver()
+        self.peer_version = None
+        self.before_hello = []
+        peer.send(wire.encode_hello())
+        self.hello_timer.start()
+        if self.join_level is not None and self.room_id is None:
+            peer.send(wire.encode_join(self.join_level))
+
+    def join(self, level_name):
+        # Zgłoszenie do lobby serwera dedykowanego; jeśli połączenie jeszcze nie gotowe — wyśle on_connected
+        self.join_level = level_name
+        if self.network.peers:
+            self.network.send(wire.encode_join(level_name))
+
+    def on_hello_timeout(self):
+        if self.peer_version is None and self.network.peers:
+            message = "Brak odpowiedzi HELLO od przeciwnika — nie można sprawdzić wersji protokołu"
+            print(f"[ERROR] {message}")
+            self.handshake_failed.emit(message)
+
+    def attach_simulation(self, simulation):
+        self.simulation = simulation
+
+    def attach_lockstep(self, session):
+        self.lockstep_session = session
+
+    def send_snapshot(self):
+        if self.simulation is None or not self.network.peers:
+            return
+        message = self.snapshot_sender.encode(self.simulation)
+        if message is not None:
+            self.network.send(message)
 
     def start(self):
+        if self.is_host and not self.lockstep:
+            self.snapshot_timer.start()
         if self.current_player() == self.my_color:
             self.turn_active = True
             self.turn_timer.start()
@@ -37,7 +107,11 @@ class NetworkTurnManager(QObject):
 
     def send_move(self, move_data):
         try:
-            self.network.send(json.dumps(move_data))
+            if self.lockstep_session is not None:
+                # Ruch trafi do przeciwnika w ramce lockstep na tick + opóźnienie wejścia
+                self.lockstep_session.queue_move(move_data["from"], move_data["to"])
+            else:
+                self.network.send(wire.encode_connect(move_data["from"], move_data["to"]))
             print(f"[NETWORK] Wysłano ruch: {move_data}")
             self.end_turn()
         except Exception as e:
@@ -52,24 +126,82 @@ class NetworkTurnManager(QObject):
             self.turn_timer.start()
             self.turn_active = True
 
-    def listen_for_moves(self):
-        while True:
-            try:
-                data = self.network.receive_data()
-                move_data = json.loads(data)
-                print(f"[NETWORK] Otrzymano dane: {move_data}")
-
-                if move_data.get("action") == "connect":
-                    # Zamiast emitować sygnał od razu robimy bo neida sie gui edytowac z innego watku niz glowny
-                    QMetaObject.invokeMethod(self, "_emit_remote_move", Qt.QueuedConnection, Q_ARG(dict, move_data))
-                    QTimer.singleShot(0, self.end_turn)  # WAŻNE: też w GUI
-                else:
-                    print(f"[WARNING] Nieznana akcja: {move_data.get('action')}")
-            except Exception as e:
-                print(f"[ERROR] Błąd odbioru danych: {e}")
+    def stop(self):
+        self.turn_timer.stop()
+        self.snapshot_timer.stop()
+        self.hello_timer.stop()
+        self.network.message_received.disconnect(self.on_message)
+        self.network.connected.disconnect(self.on_connected)
 
-    @pyqtSlot(dict)
-    def _emit_remote_move(self, move_data):
-        self.remote_move_received.emit(move_data)
+    def send_moves(self, moves):
+        # Seria ruchów w jednym wywołaniu send (jedna ramka na ruch, jeden syscall)
+        try:
+            self.network.send_batch([wire.encode_connect(move["from"], move["to"]) for move in moves])
+            print(f"[NETWORK] Wysłano {len(moves)} ruchów")
+        except Exception as e:
+            print(f"[ERROR] Błąd przy wysyłaniu ruchów: {e}")
 
+    def on_message(self, peer, data):
+        try:
+            move_data = wire.decode(data)
+        except ValueError as e:
+            print(f"[ERROR] Błąd odbioru danych: {e}")
+            return
+        if move_data["action"] not in ("hello", "error") and self.peer_version != wire.PROTOCOL_VERSION:
+            self.before_hello.append((peer, data))
+            return
+        if move_data["action"] == "snapshot":
+            state = self.snapshot_receiver.receive(move_data)
+            if self.snapshot_receiver.latest_seq:
+                peer.send(wire.encode_snapshot_ack(self.snapshot_receiver.latest_seq))
+            if state is not None:
+                self.snapshot_received.emit(state)
+            return
+        if move_data["action"] == "snapshot_ack":
+            self.snapshot_sender.acknowledge(move_data["seq"])
+            return
+        if move_data["action"] in ("lockstep_input", "lockstep_checksum", "lockstep_ready"):
+            if self.lockstep_session is not None:
+                if self.lockstep_session.receive(move_data) and move_data["moves"]:
+                    self.end_turn()
+            return
+        print(f"[NETWORK] Otrzymano dane: {move_data}")
 
+        if move_data["action"] == "hello":
+            first = self.peer_version is None
+            self.peer_version = move_data["version"]
+            self.hello_timer.stop()
+            if self.peer_version != wire.PROTOCOL_VERSION:
+                message = f"Niezgodna wersja protokołu: {self.peer_version} (nasza: {wire.PROTOCOL_VERSION})"
+                print(f"[ERROR] {message}")
+                self.before_hello = []
+                self.handshake_failed.emit(message)
+                peer.close()
+                return
+            if first:
+                # Nasze HELLO mogło trafić do poprzedniego menedżera (nowa gra na tym samym połączeniu) —
+                # odpowiadamy raz, żeby przeciwnik też zakończył uzgadnianie
+                peer.send(wire.encode_hello())
+            held, self.before_hello = self.before_hello, []
+            for held_peer, held_data in held:
+                self.on_message(held_peer, held_data)
+        elif move_data["action"] == "connect":
+            self.remote_move_received.emit(move_data)
+            self.end_turn()
+        elif move_data["action"] == "matched":
+            # Serwer dedykowany jest autorytatywny (wysyła migawki), my tylko potwierdzamy i gramy kolorem z pokoju
+            self.room_id = move_data["room"]
+            self.my_color = move_data["color"]
+            self.is_host = False
+            self.matched.emit(move_data["color"], move_data["level"])
+        elif move_data["action"] == "game_over":
+            if move_data["winner"] is None:
+                self.match_ended.emit("timeout", "")
+            else:
+                self.match_ended.emit("winner", move_data["winner"])
+        elif move_data["action"] == "opponent_left":
+            self.match_ended.emit("opponent_left", "")
+        elif move_data["action"] == "error":
+            print(f"[ERROR] Serwer: {move_data['message']}")
+        else:
+            print(f"[WARNING] Nieznana akcja: {move_data.get('action')}")
@@ -7,32 +7,100 @@ from PyQt5.QtGui import QPainterPath, QPixmap, QPainter, QPen, QBrush, QColor
 from PyQt5.QtWidgets import QGraphicsOpacityEffect, QGraphicsItem, QGraphicsEllipseItem, QGraphicsLineItem, \
     QGraphicsScene
 
+from engine import NodeState
 
 
+# Przeskalowane obrazki współdzielone przez wszystkie węzły i jednostki: (kolor, typ, rozmiar) -> QPixmap
+_pixmap_cache = {}
+
+
+def cached_pixmap(color, node_type, size):
+    key = (color, node_type, size)
+    pixmap = _pixmap_cache.get(key)
+    if pixmap is None:
+        # Dla typu "circle" używamy "node" w nazwie pliku
+        image_name = "node" if node_type == "circle" else node_type
+        pixmap = QPixmap(f":/images/{color}_{image_name}.png")
+        if not pixmap.isNull():
+            pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        _pixmap_cache[key] = pixmap
+    return pixmap
+
+
+def warm_pixmap_cache(colors, node_types=("circle", "plus", "triangle"), size=60):
+    for color in colors:
+        for node_type in node_types:
+            cached_pixmap(color, node_type, size)
+    cached_pixmap("green", "unit", UnitLayer.PIXMAP_SIZE)
 
 
 class BaseNode(QGraphicsEllipseItem):
+    # Stan węzła trzyma engine.NodeState, tutaj jest tylko jego widok
     def __init__(self, x, y, radius, color, is_player=False, initial_units=10, node_type="circle", max_connections=3):
         super().__init__(-radius, -radius, 2 * radius, 2 * radius)
+        self.state = NodeState(x, y, color, is_player=is_player, unit_count=initial_units,
+                               node_type=node_type, max_connections=max_connections)
         self.setBrush(QBrush(QColor(color)))
         self.setPen(QPen(Qt.white, 2))
         self.setPos(x, y)
         self.radius = radius
-        self.color_name = color
         self.color = color
-        self.color_name = color  # (jeśli używasz color_name gdzie indziej)
-        self.is_player = is_player
-        self.unit_count = initial_units
-        self.node_type = node_type
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setAcceptHoverEvents(True)
 
-        self.production_timer = QTimer()
-        self.production_timer.timeout.connect(self.produce_unit)
-        self.production_timer.start(self.production_interval())
+    @classmethod
+    def from_state(cls, state, radius=30):
+        # Widok dla istniejącego stanu (np. z klatki kluczowej powtórki)
+        node = cls(state.x, state.y, radius, state.color_name, is_player=state.is_player,
+                   initial_units=state.unit_count, node_type=state.node_type,
+                   max_connections=state.max_connections)
+        node.state = state
+        return node
+
+    @property
+    def node_id(self):
+        # Stałe id nadawane przez Simulation.add_node — to samo u obu graczy i w zapisie historii
+        return self.state.id
+
+    @property
+    def color_name(self):
+        return self.state.color_name
+
+    @color_name.setter
+    def color_name(self, value):
+        self.state.color_name = value
+
+    @property
+    def is_player(self):
+        return self.state.is_player
 
-        self.max_connections = max_connections
-        self.current_connections = 0
+    @is_player.setter
+    def is_player(self, value):
+        self.state.is_player = value
+
+    @property
+    def unit_count(self):
+        return self.state.unit_count
+
+    @unit_count.setter
+    def unit_count(self, value):
+        self.state.unit_count = value
+
+    @property
+    def node_type(self):
+        return self.state.node_type
+
+    @property
+    def max_connections(self):
+        return self.state.max_connections
+
+    @property
+    def current_connections(self):
+        return self.state.current_connections
+
+    @current_connections.setter
+    def current_connections(self, value):
+        self.state.current_connections = value
 
     def play_capture_animation(self):
         self.setGraphicsEffect(None)  # Reset jak coś zostało
@@ -59,42 +127,23 @@ class BaseNode(QGraphicsEllipseItem):
         self._animation = animation  # zapobiegaj GC
 
     def can_connect(self):
-        return self.current_connections < self.max_connections
+        return self.state.can_connect()
 
     def register_connection(self):
-        self.current_connections += 1
+        self.state.register_connection()
+        self.update()
 
     def unregister_connection(self):
-        if self.current_connections > 0:
-            self.current_connections -= 1
-
-    def production_interval(self):
-        # Czas produkcji zależy od typu
-        if self.node_type == "plus":
-            return 1500  # szybsza produkcja
-        elif self.node_type == "triangle":
-            return 2500  # wolniejsza
-        else:
-            return 2000  # domyślna
-
-    def produce_unit(self):
-        max_units = 30
-        if self.unit_count < max_units:
-            self.unit_count += 1
-            self.update()
+        self.state.unregister_connection()
+        self.update()
 
     def paint(self, painter: QPainter, option, widget=None):
         painter.setRenderHint(QPainter.Antialiasing)
 
-        # Dla typu "circle" używamy "node" w nazwie pliku
-        image_name = "node" if self.node_type == "circle" else self.node_type
-        pixmap_path = f":/images/{self.color_name}_{image_name}.png"
-        pixmap = QPixmap(pixmap_path)
+        pixmap = cached_pixmap(self.color_name, self.node_type, 60)
 
         if not pixmap.isNull():
-            size = 60
-            scaled = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            painter.drawPixmap(-30, -30, scaled)
+            painter.drawPixmap(-30, -30, pixmap)
         else:
             # fallback jeśli obrazek nie został znaleziony
             painter.setBrush(self.brush())
@@ -149,7 +198,7 @@ class BaseNode(QGraphicsEllipseItem):
 
 
     def decrease_unit(self, amount=1):
-        self.unit_count = max(0, self.unit_count - amount)
+        self.state.decrease_unit(amount)
         self.update()
 
     def start_pulsing(self):
@@ -182,134 +231,77 @@ class BaseNode(QGraphicsEllipseItem):
             self.setGraphicsEffect(None)
 
 
-class Unit(QGraphicsItem):
-    def __init__(self, start_pos: QPointF, end_pos: QPointF, target_node, source_color, source_node_type="circle", color='white', speed=1.5):
-        super().__init__()
-        self._radius = 5
-        self.color = QColor(color)
-        self.setPos(start_pos)
-        self.target = end_pos
-        self.target_node = target_node
-        self.source_color = source_color
-        self.source_node_type = source_node_type
-        self.speed = speed
+class UnitLayer(QGraphicsItem):
+    # Wszystkie jednostki w locie (engine.UnitSwarm) rysowane jednym paint() — jeden element sceny zamiast tysięcy
+    PIXMAP_SIZE = 20
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.move_step)
-        self.timer.start(16)
+    def __init__(self, swarm):
+        super().__init__()
+        self.swarm = swarm
+        self._rect = QRectF()
+        self.setZValue(1)
+        self.setAcceptedMouseButtons(Qt.NoButton)
 
     def boundingRect(self) -> QRectF:
-        r = self._radius
-        return QRectF(-r, -r, 2 * r, 2 * r)
+        return self._rect
+
+    def shape(self):
+        # Pusty kształt — warstwa nie przechwytuje itemAt() ani kliknięć w węzły pod spodem
+        return QPainterPath()
+
+    def sync(self):
+        # Wywoływane raz na klatkę: jeden wspólny prostokąt dla wszystkich jednostek
+        _, positions = self.swarm.positions()
+        if len(positions):
+            half = self.PIXMAP_SIZE / 2
+            x_min, y_min = positions.min(axis=0)
+            x_max, y_max = positions.max(axis=0)
+            rect = QRectF(x_min - half, y_min - half, x_max - x_min + 2 * half, y_max - y_min + 2 * half)
+        else:
+            rect = QRectF()
 
-    def paint(self, painter: QPainter, option, widget=None):
-        pixmap = QPixmap(":/images/green_unit.png")
-        size = 20
-        scaled = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        painter.drawPixmap(-10, -10, scaled)
-
-    def move_step(self):
-        current = self.pos()
-        direction = self.target - current
-        dist = (direction.x() ** 2 + direction.y() ** 2) ** 0.5
-
-        if dist < self.speed:
-            self.setPos(self.target)
-            self.timer.stop()
+        if rect != self._rect:
+            self.prepareGeometryChange()
+            self._rect = rect
+        self.update()
 
-            if self.target_node and self.target_node.color_name == self.source_color:
-                healing = HealingEffect(self.target, self.scene())
-                self.scene().addItem(healing)
-            else:
-                spark = SparkEffect(self.target, self.scene(), color=QColor(255, 215, 0))
-                self.scene().addItem(spark)
-
-            if self.target_node:
-                if self.target_node.color_name == self.source_color:
-                    # Wysyłanie do swojego — wsparcie
-                    if self.source_node_type == "plus":
-                        self.target_node.unit_count += 2
-                    else:
-                        self.target_node.unit_count += 1
-                    self.target_node.update()
-                else:
-                    # Atak na wroga
-                    if self.source_node_type == "triangle":
-                        self.target_node.decrease_unit(2)
-                    else:
-                        self.target_node.decrease_unit(1)
-
-                    # Sprawdź, czy przejmujemy
-                    if self.target_node.unit_count == 0:
-                        self.target_node.color_name = self.source_color
-                        self.target_node.is_player = (self.source_color == "green")
-                        self.target_node.unit_count = 1
-                        self.target_node.current_connections = 0
-
-                        # Usuń stare linie
-                        for item in list(self.scene().items()):
-                            if isinstance(item, ConnectionLine):
-                                if item.start_node == self.target_node or item.end_node == self.target_node:
-                                    if item.owner_color == item.start_node.color_name:
-                                        item.start_node.unregister_connection()
-                                    self.scene().removeItem(item)
-
-                        self.target_node.play_capture_animation()
-                        self.target_node.update()
-                        # Sprawdź zwycięstwo/przegraną
-                        if self.scene():
-                            view = self.scene().views()[0]
-                            from game_view import GameView
-                            if isinstance(view, GameView):
-                                view.check_game_over()
-
-            if self.scene():
-                self.scene().removeItem(self)
+    def paint(self, painter: QPainter, option, widget=None):
+        _, positions = self.swarm.positions()
+        if not len(positions):
             return
 
-        step = direction / dist * self.speed
-        self.setPos(current + step)
-
+        pixmap = cached_pixmap("green", "unit", self.PIXMAP_SIZE)
+        if not pixmap.isNull():
+            source = QRectF(pixmap.rect())
+            fragments = [QPainter.PixmapFragment.create(QPointF(x, y), source) for x, y in positions.tolist()]
+            painter.drawPixmapFragments(fragments, pixmap)
+        else:
+            # fallback jeśli obrazek nie został znaleziony
+            painter.setBrush(QColor("lightgreen"))
+            painter.setPen(Qt.NoPen)
+            for x, y in positions.tolist():
+                painter.drawEllipse(QPointF(x, y), 5, 5)
 
 
 class ConnectionLine(QGraphicsLineItem):
-    def __init__(self, start_node, end_node, scene):
+    # Widok połączenia — wysyłanie jednostek liczy engine.Simulation
+    def __init__(self, start_node, end_node, connection):
         super().__init__(QLineF(start_node.pos(), end_node.pos()))
         self.setPen(QPen(QColor("lightgreen"), 3, Qt.DashLine))
         self.start_node = start_node
         self.end_node = end_node
         self.setZValue(-1)
 
-        self.scene_ref = scene
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.send_unit)
-        self.timer.start(1000)
-
-        self.owner_color = start_node.color_name  # zakładamy że start_node to właściciel
-
-    def send_unit(self):
-        if self.start_node.unit_count > 0:
-            unit = Unit(
-                self.start_node.pos(),
-                self.end_node.pos(),
-                target_node=self.end_node,
-                source_color=self.start_node.color_name,
-                source_node_type=self.start_node.node_type,
-                color='lightgreen'
-            )
-            self.scene_ref.addItem(unit)
-            self.start_node.decrease_unit(1)
+        self.connection = connection
+        self.owner_color = connection.owner_color
 
     def mousePressEvent(self, event):
         if self.owner_color != "green":
             return  # Gracz może usuwać tylko swoje linie
 
-        self.timer.stop()
         if self.scene():
-            if self.owner_color == self.start_node.color_name:
-                self.start_node.unregister_connection()
-
-            self.scene().removeItem(self)
+            view = self.scene().views()[0]
+            view.on_connection_clicked(self)
 
 
 
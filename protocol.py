@@ -0,0 +1,108 @@
+import asyncio
+import struct
+
+# Ramka: 4 bajty długości (big-endian) + treść (bajty, np. z wire.py)
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def encode_message(data) -> bytes:
+    payload = data.encode() if isinstance(data, str) else bytes(data)
+    return HEADER.pack(len(payload)) + payload
+
+
+def encode_batch(messages) -> bytes:
+    # Kilka wiadomości w jednym buforze — cała seria idzie jednym write()
+    return b"".join(encode_message(m) for m in messages)
+
+
+class MessageBuffer:
+    # Bufor ramek: jeden odczyt z gniazda może zawierać pół wiadomości albo kilka naraz
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes):
+        # Dokłada bajty do bufora i zwraca wszystkie kompletne wiadomości
+        self.buffer.extend(data)
+        messages = []
+        while True:
+            message = self.pop_message()
+            if message is None:
+                return messages
+            messages.append(message)
+
+    def pop_message(self):
+        if len(self.buffer) < HEADER.size:
+            return None
+        (length,) = HEADER.unpack_from(self.buffer)
+        if length > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Za duża wiadomość: {length} bajtów")
+        end = HEADER.size + length
+        if len(self.buffer) < end:
+            return None
+        payload = bytes(self.buffer[HEADER.size:end])
+        del self.buffer[:end]
+        return payload
+
+
+class FramedProtocol(asyncio.Protocol):
+    # Jedno połączenie w pętli asyncio; zdarzenia trafiają do handlera
+    # (on_connected / on_message / on_disconnected), bez osobnych wątków
+    def __init__(self, handler, initial=b""):
+        self.handler = handler
+        self.buffer = MessageBuffer()
+        # Bajty odebrane wcześniej przez inny proces (np. lobby przed przekazaniem gniazda)
+        self.buffer.buffer.extend(initial)
+        self.transport = None
+        self.address = None
+        self.paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.address = transport.get_extra_info("peername")
+        self.handler.on_connected(self)
+        if self.buffer.buffer:
+            self.data_received(b"")
+
+    def data_received(self, data):
+        self.buffer.buffer.extend(data)
+        # Po jednej wiadomości — handler może wstrzymać odczyt w trakcie (pause),
+        # wtedy reszta zostaje w buforze dla następnego właściciela połączenia
+        while not self.paused:
+            try:
+                message = self.buffer.pop_message()
+            except ValueError as e:
+                print(f"[NETWORK] Błędna ramka od {self.address}: {e}")
+                self.transport.close()
+                return
+            if message is None:
+                return
+            self.handler.on_message(self, message)
+
+    def pause(self):
+        self.paused = True
+        self.transport.pause_reading()
+
+    def resume(self):
+        self.paused = False
+        self.transport.resume_reading()
+        self.data_received(b"")
+
+    def unread(self) -> bytes:
+        # Nieprzetworzone bajty (całe ramki i początek następnej) — do przekazania razem z gniazdem
+        return bytes(self.buffer.buffer)
+
+    def connection_lost(self, exc):
+        self.handler.on_disconnected(self)
+
+    def send(self, data):
+        if self.transport and not self.transport.is_closing():
+            self.transport.write(encode_message(data))
+
+    def send_batch(self, messages):
+        if self.transport and not self.transport.is_closing():
+            self.transport.write(encode_batch(messages))
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
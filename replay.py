@@ -0,0 +1,239 @@
+# Binarny zapis powtórek (bez Qt): plik tylko dopisywany w trakcie meczu — zdarzenia i co jakiś czas
+# pełny stan symulacji (klatka kluczowa). Czytnik mapuje plik (mmap) i skacze do czasu T przez indeks
+# klatek kluczowych bez parsowania całości.
+#
+# Plik:  NAGŁÓWEK | rekord* | [INDEKS | STOPKA]   (indeks i stopka dopisywane przy zamknięciu)
+# Rekord: typ (B), czas symulacji (d), długość treści (I), treść
+import bisect
+import mmap
+import os
+import struct
+import time as clock
+
+import numpy as np
+
+import wire
+from engine import NodeState, ConnectionState, Simulation
+
+MAGIC = b"CEWR"
+VERSION = 2  # 2: rekordy dodania węzła i zdarzenia "disconnect"
+KEYFRAME_INTERVAL = 5.0  # sekundy symulacji między klatkami kluczowymi
+REPLAY_DIR = "replays"
+
+REC_EVENT = 1
+REC_KEYFRAME = 2
+REC_NODE = 3  # węzeł postawiony w trakcie meczu (przeciąganie z menu)
+
+EVENT_TYPES = ["attack", "support", "disconnect"]
+EVENT_ACTORS = ["player", "AI", "network"]
+NODE_TYPES = ["circle", "plus", "triangle"]
+
+_HEADER = struct.Struct("!4sHH")  # magia, wersja, długość nazwy poziomu (dalej nazwa w UTF-8)
+_RECORD = struct.Struct("!BdI")
+_EVENT = struct.Struct("!BHHB")  # typ, id źródła, id celu, kto
+_NODE_ADDED = struct.Struct("!HddBHBBB")  # id, x, y, kolor, jednostki, typ, maks. połączeń, kto
+_COUNTS = struct.Struct("!HHIQB")  # węzły, połączenia, jednostki w locie, następne id jednostki, kolory
+_NODE = struct.Struct("!ddBHBBBd")  # x, y, kolor, jednostki, typ, maks. połączeń, połączenia, postęp produkcji
+_CONNECTION = struct.Struct("!HHBd")  # źródło, cel, kolor właściciela, czas od ostatniego wysłania
+_INDEX_ENTRY = struct.Struct("!dQ")  # czas, przesunięcie rekordu klatki
+_FOOTER = struct.Struct("!QI4s")  # przesunięcie indeksu, liczba wpisów, magia
+# Jednostki w locie jako surowe tablice (kolejność pól jak w UnitSwarm)
+_UNIT_ARRAYS = (("ids", "<i8", ()), ("pos", "<f8", (2,)), ("speed", "<f8", ()), ("target", "<i4", ()),
+                ("color", "<i4", ()), ("support", "<i4", ()), ("damage", "<i4", ()))
+
+
+def new_replay_path(level_name):
+    return os.path.join(REPLAY_DIR, f"{level_name}_{clock.strftime('%Y%m%d_%H%M%S')}.cewr")
+
+
+def encode_keyframe(simulation):
+    units = simulation.units
+    n = len(units)
+    parts = [_COUNTS.pack(len(simulation.nodes), len(simulation.connections), n, units.next_id,
+                          len(simulation.colors))]
+    parts.append(bytes(wire.COLORS.index(color) for color in simulation.colors))
+    for node in simulation.nodes:
+        parts.append(_NODE.pack(node.x, node.y, wire.COLORS.index(node.color_name), node.unit_count,
+                                NODE_TYPES.index(node.node_type), node.max_connections,
+                                node.current_connections, node.production_progress))
+    for c in simulation.connections:
+        parts.append(_CONNECTION.pack(c.source.id, c.target.id, wire.COLORS.index(c.owner_color),
+                                      c.send_elapsed))
+    for name, dtype, _ in _UNIT_ARRAYS:
+        parts.append(getattr(units, name)[:n].astype(dtype).tobytes())
+    return b"".join(parts)
+
+
+def decode_keyframe(payload, time=0.0):
+    # Odtwarza pełną Simulation z klatki kluczowej
+    node_count, connection_count, unit_count, next_id, color_count = _COUNTS.unpack_from(payload)
+    offset = _COUNTS.size
+    simulation = Simulation()
+    simulation.time = time
+    for code in payload[offset:offset + color_count]:
+        simulation.color_code(wire.COLORS[code])
+    offset += color_count
+
+    for _ in range(node_count):
+        x, y, color, units, node_type, max_connections, connections, progress = _NODE.unpack_from(payload, offset)
+        offset += _NODE.size
+        node = NodeState(x, y, wire.COLORS[color], is_player=(wire.COLORS[color] == "green"), unit_count=units,
+                         node_type=NODE_TYPES[node_type], max_connections=max_connections)
+        node.current_connections = connections
+        node.production_progress = progress
+        simulation.add_node(node)
+
+    for _ in range(connection_count):
+        source_id, target_id, owner, elapsed = _CONNECTION.unpack_from(payload, offset)
+        offset += _CONNECTION.size
+        source, target = simulation.nodes[source_id], simulation.nodes[target_id]
+        connection = ConnectionState(source, target)
+        connection.owner_color = wire.COLORS[owner]
+        connection.send_elapsed = elapsed
+        simulation.connections[connection] = None
+        source.outgoing.append(connection)
+        target.incoming.append(connection)
+
+    swarm = simulation.units
+    while len(swarm.ids) < unit_count:
+        swarm._grow()
+    for name, dtype, shape in _UNIT_ARRAYS:
+        values = np.frombuffer(payload, dtype=dtype, count=unit_count * (shape[0] if shape else 1), offset=offset)
+        getattr(swarm, name)[:unit_count] = values.reshape((unit_count,) + shape)
+        offset += values.nbytes
+    if unit_count:
+        node_xy = np.array([(node.x, node.y) for node in simulation.nodes], dtype=np.float64)
+        swarm.target_pos[:unit_count] = node_xy[swarm.target[:unit_count]]
+    swarm.count = unit_count
+    swarm.next_id = next_id
+    return simulation
+
+
+class ReplayWriter:
+    # Strumieniowy zapis w trakcie meczu; plik jest poprawny także bez close() (czytnik wtedy skanuje)
+    def __init__(self, path, level_name, keyframe_interval=KEYFRAME_INTERVAL):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.last_keyframe = None
+        self.index = []  # (czas, przesunięcie) klatek kluczowych
+        name = level_name.encode()
+        self.file.write(_HEADER.pack(MAGIC, VERSION, len(name)) + name)
+
+    def _write_record(self, record_type, time, payload):
+        offset = self.file.tell()
+        self.file.write(_RECORD.pack(record_type, time, len(payload)) + payload)
+        return offset
+
+    def write_event(self, time, event):
+        # Zdarzenie w formacie GameView.log_event / log_node_added
+        if event["type"] == "add_node":
+            self._write_record(REC_NODE, time, _NODE_ADDED.pack(
+                event["node"], event["x"], event["y"], wire.COLORS.index(event["color"]), event["units"],
+                NODE_TYPES.index(event["node_type"]), event["max_connections"], EVENT_ACTORS.index(event["by"])))
+            return
+        self._write_record(REC_EVENT, time, _EVENT.pack(
+            EVENT_TYPES.index(event["type"]), event["from"], event["to"], EVENT_ACTORS.index(event["by"])))
+
+    def write_keyframe(self, simulation):
+        offset = self._write_record(REC_KEYFRAME, simulation.time, encode_keyframe(simulation))
+        self.index.append((simulation.time, offset))
+        self.last_keyframe = simulation.time
+        self.file.flush()
+
+    def maybe_keyframe(self, simulation):
+        if self.last_keyframe is None or simulation.time - self.last_keyframe >= self.keyframe_interval:
+            self.write_keyframe(simulation)
+
+    def close(self, simulation=None):
+        # Z podaną symulacją dopisuje jeszcze klatkę ze stanem końcowym (powtórka kończy się dokładnie tam)
+        if self.file.closed:
+            return
+        if simulation is not None:
+            self.write_keyframe(simulation)
+        index_offset = self.file.tell()
+        self.file.write(b"".join(_INDEX_ENTRY.pack(time, offset) for time, offset in self.index))
+        self.file.write(_FOOTER.pack(index_offset, len(self.index), MAGIC))
+        self.file.close()
+
+
+class ReplayReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, name_length = _HEADER.unpack_from(self.data)
+        # Wersja 1 to podzbiór wersji 2 (bez dodawania węzłów i rozłączeń), więc czytamy obie
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f"{path}: to nie jest plik powtórki (wersja {VERSION})")
+        self.level_name = self.data[_HEADER.size:_HEADER.size + name_length].decode()
+        self.records_start = _HEADER.size + name_length
+        self.records_end, self.keyframe_times, self.keyframe_offsets = self._load_index()
+
+    def _load_index(self):
+        # Indeks ze stopki; gdy plik nie został zamknięty (np. przerwana gra) — przegląd samych nagłówków
+        size = len(self.data)
+        if size >= self.records_start + _FOOTER.size:
+            index_offset, count, magic = _FOOTER.unpack_from(self.data, size - _FOOTER.size)
+            if magic == MAGIC and index_offset + count * _INDEX_ENTRY.size + _FOOTER.size == size:
+                entries = [_INDEX_ENTRY.unpack_from(self.data, index_offset + i * _INDEX_ENTRY.size)
+                           for i in range(count)]
+                return index_offset, [t for t, _ in entries], [o for _, o in entries]
+        times, offsets = [], []
+        offset = self.records_start
+        while offset + _RECORD.size <= size:
+            record_type, time, length = _RECORD.unpack_from(self.data, offset)
+            if offset + _RECORD.size + length > size:
+                break  # urwany ostatni rekord
+            if record_type == REC_KEYFRAME:
+                times.append(time)
+                offsets.append(offset)
+            offset += _RECORD.size + length
+        return offset, times, offsets
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def records(self, start=None):
+        # (przesunięcie, typ, czas, treść) kolejnych rekordów; treść to memoryview bez kopiowania
+        offset = self.records_start if start is None else start
+        view = memoryview(self.data)
+        while offset < self.records_end:
+            record_type, time, length = _RECORD.unpack_from(self.data, offset)
+            body = offset + _RECORD.size
+            yield offset, record_type, time, view[body:body + length]
+            offset = body + length
+
+    def events(self, start=None, until=float("inf")):
+        # Zdarzenia w stylu GameView.log_event, z dokładnym czasem symulacji
+        for offset, record_type, time, payload in self.records(start):
+            if time > until:
+                return
+            if record_type == REC_EVENT:
+                event_type, source, target, actor = _EVENT.unpack(payload)
+                yield time, {"type": EVENT_TYPES[event_type], "from": source, "to": target,
+                             "by": EVENT_ACTORS[actor]}
+            elif record_type == REC_NODE:
+                node_id, x, y, color, units, node_type, max_connections, actor = _NODE_ADDED.unpack(payload)
+                yield time, {"type": "add_node", "node": node_id, "x": x, "y": y, "color": wire.COLORS[color],
+                             "units": units, "node_type": NODE_TYPES[node_type],
+                             "max_connections": max_connections, "by": EVENT_ACTORS[actor]}
+
+    def duration(self):
+        last = 0.0
+        for _, _, time, _ in self.records(self.keyframe_offsets[-1] if self.keyframe_offsets else None):
+            last = time
+        return last
+
+    def keyframe_at(self, time):
+        # Ostatnia klatka kluczowa nie późniejsza niż time: (Simulation, przesunięcie następnego rekordu)
+        i = bisect.bisect_right(self.keyframe_times, time) - 1
+        if i < 0:
+            raise ValueError("Brak klatki kluczowej przed podanym czasem")
+        offset = self.keyframe_offsets[i]
+        _, keyframe_time, length = _RECORD.unpack_from(self.data, offset)
+        body = offset + _RECORD.size
+        return decode_keyframe(self.data[body:body + length], keyframe_time), body + length
@@ -0,0 +1,131 @@
+# Odtwarzanie zapisanych meczów (bez Qt): symulacja liczona od nowa z zapisanych ruchów,
+# w tempie 1x / 10x / 100x, oraz skok do dowolnego czasu T przez klatki kluczowe powtórki.
+import xml.etree.ElementTree as ET
+
+from engine import NodeState, Simulation
+from levels import LEVELS
+from replay import ReplayReader
+
+REPLAY_SPEEDS = (1, 10, 100)
+REPLAY_STEP = 1 / 60  # krok symulacji przy odtwarzaniu
+
+
+class ReplayPlayer:
+    def __init__(self, simulation, events=(), duration=None, reader=None, level_name=""):
+        self.simulation = simulation
+        self.level_name = level_name
+        self.reader = reader  # replay.ReplayReader albo None (historia XML bez klatek kluczowych)
+        self.initial = simulation.copy()
+        self.history_events = sorted(events, key=lambda item: item[0])  # [(czas, zdarzenie)]
+        self.duration = duration if duration is not None else (
+            self.history_events[-1][0] if self.history_events else 0.0)
+        self.speed = 1
+        # Wykonanie zdarzeń na zwalidowanych węzłach; GameView podmienia, żeby dorysować zmiany na planszy
+        self.connect = lambda source, target: self.simulation.connect(source, target)
+        self.disconnect = lambda connection: self.simulation.disconnect(connection)
+        self.add_node = lambda node: self.simulation.add_node(node)
+        self._pending = iter(self.history_events)
+        self._next = next(self._pending, None)
+
+    @classmethod
+    def from_replay(cls, path):
+        reader = ReplayReader(path)
+        simulation, offset = reader.keyframe_at(reader.keyframe_times[0])
+        player = cls(simulation, duration=reader.duration(), reader=reader, level_name=reader.level_name)
+        player._pending = reader.events(offset)
+        player._next = next(player._pending, None)
+        return player
+
+    @classmethod
+    def from_history_xml(cls, path):
+        # Historia XML ma tylko stan końcowy, więc start to układ poziomu (albo zapisane węzły, gdy poziomu brak)
+        root = ET.parse(path).getroot()
+        level_name = root.attrib.get("level", "unknown")
+        if level_name in LEVELS:
+            simulation = Simulation.from_level(LEVELS[level_name])
+        else:
+            simulation = Simulation()
+            for node_elem in root.findall("node"):
+                color = node_elem.attrib["color"]
+                simulation.add_node(NodeState(int(node_elem.attrib["x"]), int(node_elem.attrib["y"]), color,
+                                              is_player=(color == "green"), unit_count=int(node_elem.attrib["units"]),
+                                              node_type=node_elem.attrib["type"]))
+        events = [(float(e.attrib["time"]), _xml_event(e.attrib)) for e in root.findall("event")]
+        return cls(simulation, events, duration=float(root.attrib.get("duration", 0)) or None,
+                   level_name=level_name)
+
+    @property
+    def time(self):
+        return self.simulation.time
+
+    def finished(self):
+        # Tolerancja jak w Simulation.fast_forward — suma kroków nie trafia idealnie w duration
+        return self.time >= self.duration - 1e-9 and self._next is None
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    def advance(self, real_dt):
+        # Krok odtwarzania o real_dt sekund czasu rzeczywistego; zwraca zdarzenia jak Simulation.step
+        return self._run_until(min(self.time + real_dt * self.speed, max(self.duration, self.time)))
+
+    def seek(self, time):
+        # Skok do czasu T bez rysowania: od najbliższej wcześniejszej klatki kluczowej (albo od początku)
+        time = min(time, self.duration)
+        if self.reader is not None:
+            self.simulation, offset = self.reader.keyframe_at(max(time, self.reader.keyframe_times[0]))
+            self._pending = self.reader.events(offset)
+        else:
+            self.simulation = self.initial.copy()
+            self._pending = iter(self.history_events)
+        self._next = next(self._pending, None)
+        # Po skoku widok rysuje się od nowa z nowej symulacji — ruchy po drodze bez self.connect,
+        # który wskazuje na widoki starej planszy
+        self._run_until(time, draw=False)
+        return self.simulation
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+
+    def _run_until(self, time, draw=True):
+        events = []
+        while True:
+            next_time = self._next[0] if self._next is not None else float("inf")
+            events.extend(self.simulation.fast_forward(max(0.0, min(time, next_time) - self.time), REPLAY_STEP))
+            if self._next is None or next_time > time:
+                return events
+            self._apply(self._next[1], draw)
+            self._next = next(self._pending, None)
+
+    def _apply(self, event, draw=True):
+        nodes = self.simulation.nodes
+        if event["type"] == "add_node":
+            # Id nadaje Simulation.add_node po kolei — zapisane id musi być następnym wolnym
+            if event["node"] != len(nodes):
+                return
+            node = NodeState(event["x"], event["y"], event["color"], is_player=(event["color"] == "green"),
+                             unit_count=event["units"], node_type=event["node_type"],
+                             max_connections=event["max_connections"])
+            (self.add_node if draw else self.simulation.add_node)(node)
+            return
+        if max(event["from"], event["to"]) >= len(nodes) or event["from"] == event["to"]:
+            return
+        source, target = nodes[event["from"]], nodes[event["to"]]
+        if event["type"] == "disconnect":
+            connection = next((c for c in source.outgoing if c.target is target), None)
+            if connection is not None:
+                (self.disconnect if draw else self.simulation.disconnect)(connection)
+            return
+        # Te same warunki co GameView.perform_connection
+        if source.can_connect() and target.can_connect():
+            (self.connect if draw else self.simulation.connect)(source, target)
+
+
+def _xml_event(attrib):
+    # Atrybuty XML to napisy — liczby wracają do typów z GameView.record_event
+    if attrib["type"] == "add_node":
+        return {"type": "add_node", "node": int(attrib["node"]), "x": float(attrib["x"]), "y": float(attrib["y"]),
+                "color": attrib["color"], "units": int(attrib["units"]), "node_type": attrib["node_type"],
+                "max_connections": int(attrib["max_connections"]), "by": attrib["by"]}
+    return {"type": attrib["type"], "from": int(attrib["from"]), "to": int(attrib["to"]), "by": attrib["by"]}
@@ -1,39 +1,14 @@
-import socket
-import threading
+import asyncio
+
+from protocol import FramedProtocol
 
 HOST = '0.0.0.0'  # nasłuchiwanie na wszystkich interfejsach
 PORT = 12345
 
-conn = None
-
-def start_server(port=12345):
-    global conn
-    HOST = '0.0.0.0'
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.bind((HOST, port))
-    server.listen(1)
-    print(f"[SERVER] Czekam na gracza na porcie {port}...")
-    conn, addr = server.accept()
-    print(f"[SERVER] Połączono z: {addr}")
-    receive_test_message()
-
-
-def receive_test_message():
-    message = receive_data()
-    print(f"[SERVER] Otrzymano wiadomość: {message}")
-
-def send_data(data: str):
-    global conn
-    if conn:
-        conn.sendall(data.encode())
-    else:
-        print("[ERROR] Próba wysłania danych bez połączenia!")
-
-def receive_data() -> str:
-    global conn
-    if conn:
-        return conn.recv(1024).decode()
-    else:
-        print("[ERROR] Próba odebrania danych bez połączenia!")
-        return ""
 
+async def start_server(handler, port=PORT, host=HOST):
+    # Nie blokuje: każde nowe połączenie (może ich być wiele) trafia do handler.on_connected
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: FramedProtocol(handler), host, port)
+    print(f"[SERVER] Czekam na graczy na porcie {port}...")
+    return server
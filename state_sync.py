@@ -0,0 +1,89 @@
+# Autorytatywne migawki stanu dla gry sieciowej (bez Qt).
+# Host co SNAPSHOT_INTERVAL wysyła właścicieli węzłów, liczby jednostek i połączenia,
+# ale tylko jako różnicę względem ostatniej migawki potwierdzonej przez klienta.
+import wire
+
+SNAPSHOT_INTERVAL = 0.1  # sekundy
+SNAPSHOT_HISTORY = 64  # ile wysłanych/odebranych migawek trzymamy jako możliwe bazy
+
+
+class BoardState:
+    # Niezmienny stan planszy: węzły jako krotki (kolor, jednostki) po id, połączenia jako pary id
+    def __init__(self, nodes=(), connections=frozenset()):
+        self.nodes = tuple(nodes)
+        self.connections = frozenset(connections)
+
+    @classmethod
+    def capture(cls, simulation):
+        return cls(
+            ((node.color_name, node.unit_count) for node in simulation.nodes),
+            ((c.source.id, c.target.id) for c in simulation.connections),
+        )
+
+    def diff(self, base):
+        # Zmienione węzły oraz dodane i usunięte połączenia względem stanu base
+        nodes = [(node_id, color, units) for node_id, (color, units) in enumerate(self.nodes)
+                 if node_id >= len(base.nodes) or base.nodes[node_id] != (color, units)]
+        added = sorted(self.connections - base.connections)
+        removed = sorted(base.connections - self.connections)
+        return nodes, added, removed
+
+    def apply(self, nodes, added, removed):
+        merged = list(self.nodes)
+        for node_id, color, units in nodes:
+            if node_id >= len(merged):
+                merged.extend([None] * (node_id + 1 - len(merged)))
+            merged[node_id] = (color, units)
+        return BoardState(merged, (self.connections - set(removed)) | set(added))
+
+
+class SnapshotSender:
+    # Strona hosta: numeruje migawki i koduje je względem ostatniej potwierdzonej
+    def __init__(self):
+        self.seq = 0
+        self.sent = {}  # numer -> BoardState, czekające na potwierdzenie
+        self.acked_seq = 0
+        self.acked = BoardState()
+
+    def encode(self, simulation):
+        # Zwraca wiadomość do wysłania albo None, gdy klient ma już dokładnie ten stan
+        state = BoardState.capture(simulation)
+        nodes, added, removed = state.diff(self.acked)
+        if not (nodes or added or removed):
+            return None
+        self.seq += 1
+        self.sent[self.seq] = state
+        if len(self.sent) > SNAPSHOT_HISTORY:
+            del self.sent[min(self.sent)]
+        return wire.encode_snapshot(self.seq, self.acked_seq, nodes, added, removed)
+
+    def acknowledge(self, seq):
+        if seq <= self.acked_seq or seq not in self.sent:
+            return
+        self.acked_seq = seq
+        self.acked = self.sent[seq]
+        for old in [s for s in self.sent if s <= seq]:
+            del self.sent[old]
+
+
+class SnapshotReceiver:
+    # Strona klienta: odtwarza pełny stan z różnicy i pamięta bazy, do których host może się odwołać
+    def __init__(self):
+        self.states = {0: BoardState()}
+        self.latest_seq = 0
+
+    def receive(self, message):
+        # message z wire.decode; zwraca nowy BoardState albo None (migawka spóźniona lub bez bazy)
+        seq, base_seq = message["seq"], message["base"]
+        base = self.states.get(base_seq)
+        if seq <= self.latest_seq or base is None:
+            return None
+        state = base.apply(message["nodes"], message["added"], message["removed"])
+        self.states[seq] = state
+        self.latest_seq = seq
+        # Host nigdy nie cofnie się przed bazę, której właśnie użył
+        for old in [s for s in self.states if s < base_seq]:
+            del self.states[old]
+        while len(self.states) > SNAPSHOT_HISTORY:
+            del self.states[min(self.states)]
+        return state
@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from engine import NodeState, Simulation
+from levels import LEVELS
+from replay import ReplayWriter
+from replay_player import ReplayPlayer
+
+MOVES = {2.0: (0, 2), 7.0: (1, 3)}  # czas -> (z, do), oba ruchy zielonego na Poziomie 5
+
+
+def record_match(path, seconds=12.0):
+    # Nagranie jak w GameView: klatka startowa, ruchy w trakcie, klatka końcowa przy close()
+    simulation = Simulation.from_level(LEVELS["Poziom 5"])
+    writer = ReplayWriter(path, "Poziom 5", keyframe_interval=60.0)
+    writer.write_keyframe(simulation)
+    pending = dict(MOVES)
+    while simulation.time < seconds - 1e-9:
+        simulation.step(1 / 60)
+        for move_time, (source, target) in list(pending.items()):
+            if simulation.time >= move_time:
+                simulation.connect(simulation.nodes[source], simulation.nodes[target])
+                writer.write_event(simulation.time, {"type": "attack", "from": source, "to": target, "by": "player"})
+                del pending[move_time]
+        writer.maybe_keyframe(simulation)
+    writer.close(simulation)
+    return simulation
+
+
+def record_edited_match(path, seconds=12.0):
+    # Węzeł postawiony w trakcie gry, ruch do niego i usunięta linia — zdarzenia spoza samych połączeń
+    simulation = Simulation.from_level(LEVELS["Poziom 5"])
+    writer = ReplayWriter(path, "Poziom 5", keyframe_interval=60.0)
+    writer.write_keyframe(simulation)
+    script = [(2.0, "add"), (3.0, "support"), (5.0, "disconnect"), (6.0, "attack")]
+    states = {}
+    while simulation.time < seconds - 1e-9:
+        simulation.step(1 / 60)
+        while script and simulation.time >= script[0][0]:
+            action = script.pop(0)[1]
+            nodes = simulation.nodes
+            if action == "add":
+                node = simulation.add_node(NodeState(400, 300, "green", is_player=True, unit_count=8,
+                                                     node_type="plus", max_connections=3))
+                event = {"type": "add_node", "node": node.id, "x": 400.0, "y": 300.0, "color": "green",
+                         "units": 8, "node_type": "plus", "max_connections": 3, "by": "player"}
+            elif action == "support":
+                simulation.connect(nodes[0], nodes[6])
+                event = {"type": "support", "from": 0, "to": 6, "by": "player"}
+            elif action == "disconnect":
+                simulation.disconnect(nodes[0].outgoing[0])
+                event = {"type": "disconnect", "from": 0, "to": 6, "by": "player"}
+            else:
+                simulation.connect(nodes[6], nodes[3])
+                event = {"type": "attack", "from": 6, "to": 3, "by": "player"}
+            writer.write_event(simulation.time, event)
+        if abs(simulation.time - 9.0) < 1e-6:
+            states[9.0] = board(simulation)
+        writer.maybe_keyframe(simulation)
+    writer.close(simulation)
+    states[seconds] = board(simulation)
+    return states
+
+
+def board(simulation):
+    return ([(node.color_name, node.node_type) for node in simulation.nodes],
+            sorted((c.source.id, c.target.id) for c in simulation.connections))
+
+
+def test_seek_past_recorded_move_does_not_use_view_callback(tmp_path):
+    path = str(tmp_path / "match.cewr")
+    record_match(path)
+    player = ReplayPlayer.from_replay(path)
+
+    def stale_view(source, target):
+        raise AssertionError("seek nie powinien rysować ruchów")
+
+    player.connect = stale_view
+    simulation = player.seek(9.0)
+
+    assert simulation.time == pytest.approx(9.0)
+    assert len(simulation.connections) == len(MOVES)
+    player.close()
+
+
+def test_game_view_seek_rebuilds_board(tmp_path):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+    from PyQt5.QtCore import QEvent, Qt
+    from PyQt5.QtGui import QKeyEvent
+    from game_view import GameView
+    from main_window import MainWindow
+
+    path = str(tmp_path / "match.cewr")
+    record_match(path)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    window = MainWindow()
+    view = GameView([], "", window, mode="replay")
+    view.load_game_history(path)
+
+    # 0 s -> 10 s: po drodze oba nagrane ruchy
+    view.keyPressEvent(QKeyEvent(QEvent.KeyPress, Qt.Key_Right, Qt.NoModifier))
+
+    assert view.simulation is view.replay_player.simulation
+    assert len(view.connection_lines) == len(MOVES)
+    assert set(view.node_views) == set(view.simulation.nodes)
+    view.replay_player.close()
+    app.processEvents()
+
+
+def test_playback_applies_placed_nodes_and_disconnects(tmp_path):
+    path = str(tmp_path / "edited.cewr")
+    states = record_edited_match(path)
+
+    player = ReplayPlayer.from_replay(path)
+    player.set_speed(100)
+    while not player.finished():
+        player.advance(1 / 60)
+    assert len(player.simulation.nodes) == 7
+    assert board(player.simulation) == states[12.0]
+
+    assert board(player.seek(9.0)) == states[9.0]
+    player.close()
+
+
+def test_history_xml_events_round_trip(tmp_path):
+    import xml.etree.ElementTree as ET
+
+    path = str(tmp_path / "edited.cewr")
+    states = record_edited_match(path)
+    reader = ReplayPlayer.from_replay(path).reader
+    # Zapis jak history_writer.write_xml: wszystkie pola zdarzenia jako atrybuty-napisy
+    root = ET.Element("game", level="Poziom 5", duration="12")
+    for time, event in reader.events():
+        ET.SubElement(root, "event", {key: str(value) for key, value in dict(event, time=time).items()})
+    xml_path = str(tmp_path / "historia.xml")
+    ET.ElementTree(root).write(xml_path, encoding="utf-8", xml_declaration=True)
+
+    player = ReplayPlayer.from_history_xml(xml_path)
+    assert board(player.seek(12.0)) == states[12.0]
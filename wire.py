@@ -0,0 +1,158 @@
+# Binarny format wiadomości sieciowych: 1 bajt kodu operacji + pola stałej długości (struct).
+# Węzły identyfikowane po id (engine.NodeState.id), nie po współrzędnych w pikselach.
+import struct
+
+PROTOCOL_VERSION = 2  # 2: potwierdzenia ramek lockstep i READY przed startem
+
+OP_HELLO = 1  # uzgodnienie wersji protokołu
+OP_CONNECT = 2  # ruch: połączenie węzłów
+OP_JOIN = 3  # klient -> serwer dedykowany: szukam meczu na poziomie
+OP_MATCHED = 4  # serwer dedykowany -> klient: pokój, kolor, poziom
+OP_GAME_OVER = 5
+OP_OPPONENT_LEFT = 6
+OP_ERROR = 7
+OP_SNAPSHOT = 8  # host -> klient: różnica stanu planszy względem potwierdzonej migawki
+OP_SNAPSHOT_ACK = 9  # klient -> host: numer ostatniej odebranej migawki
+OP_LOCKSTEP_INPUT = 10  # lockstep: ruchy gracza na dany tick (może być pusta lista)
+OP_LOCKSTEP_CHECKSUM = 11  # lockstep: suma kontrolna stanu po danym ticku
+OP_LOCKSTEP_READY = 12  # lockstep: gotowość do ticku 0 (uzgadniana przed startem symulacji)
+
+COLORS = ["green", "red"]
+
+_OPCODE = struct.Struct("!B")
+_HELLO = struct.Struct("!BH")  # kod, wersja
+_CONNECT = struct.Struct("!BHH")  # kod, id źródła, id celu
+_MATCHED = struct.Struct("!BIB")  # kod, id pokoju, kolor; dalej nazwa poziomu w UTF-8
+_GAME_OVER = struct.Struct("!BB")  # kod, kolor zwycięzcy (NO_WINNER, gdy skończył się czas)
+NO_WINNER = 255
+_SNAPSHOT = struct.Struct("!BIIHHH")  # kod, numer, numer bazowej, węzłów, dodanych i usuniętych połączeń
+_SNAPSHOT_NODE = struct.Struct("!HBH")  # id węzła, kolor, liczba jednostek
+_SNAPSHOT_PAIR = struct.Struct("!HH")  # id źródła, id celu
+_SNAPSHOT_ACK = struct.Struct("!BI")
+_LOCKSTEP_INPUT = struct.Struct("!BIIB")  # kod, tick, potwierdzenie, liczba ruchów; dalej pary (id źródła, id celu)
+_LOCKSTEP_CHECKSUM = struct.Struct("!BII")  # kod, tick, crc32
+_LOCKSTEP_READY = struct.Struct("!BB")  # kod, flagi: READY_SEEN | READY_STARTED
+READY_SEEN = 1  # mamy READY przeciwnika
+READY_STARTED = 2  # nasza symulacja już ruszyła
+
+
+def encode_hello(version=PROTOCOL_VERSION) -> bytes:
+    return _HELLO.pack(OP_HELLO, version)
+
+
+def encode_connect(from_id, to_id) -> bytes:
+    return _CONNECT.pack(OP_CONNECT, from_id, to_id)
+
+
+def encode_join(level_name) -> bytes:
+    return _OPCODE.pack(OP_JOIN) + level_name.encode()
+
+
+def encode_matched(room_id, color, level_name) -> bytes:
+    return _MATCHED.pack(OP_MATCHED, room_id, COLORS.index(color)) + level_name.encode()
+
+
+def encode_game_over(winner) -> bytes:
+    return _GAME_OVER.pack(OP_GAME_OVER, NO_WINNER if winner is None else COLORS.index(winner))
+
+
+def encode_opponent_left() -> bytes:
+    return _OPCODE.pack(OP_OPPONENT_LEFT)
+
+
+def encode_error(text) -> bytes:
+    return _OPCODE.pack(OP_ERROR) + text.encode()
+
+
+def encode_snapshot(seq, base_seq, nodes, added, removed) -> bytes:
+    # nodes: [(id, kolor, jednostki)] tylko zmienione węzły; added/removed: [(id źródła, id celu)]
+    parts = [_SNAPSHOT.pack(OP_SNAPSHOT, seq, base_seq, len(nodes), len(added), len(removed))]
+    parts.extend(_SNAPSHOT_NODE.pack(node_id, COLORS.index(color), units) for node_id, color, units in nodes)
+    parts.extend(_SNAPSHOT_PAIR.pack(*pair) for pair in added)
+    parts.extend(_SNAPSHOT_PAIR.pack(*pair) for pair in removed)
+    return b"".join(parts)
+
+
+def encode_snapshot_ack(seq) -> bytes:
+    return _SNAPSHOT_ACK.pack(OP_SNAPSHOT_ACK, seq)
+
+
+def encode_lockstep_input(tick, moves, ack=0) -> bytes:
+    # ack: wszystkie ramki przeciwnika z tickiem < ack już dotarły (może przestać je ponawiać)
+    return (_LOCKSTEP_INPUT.pack(OP_LOCKSTEP_INPUT, tick, ack, len(moves))
+            + b"".join(_SNAPSHOT_PAIR.pack(*move) for move in moves))
+
+
+def encode_lockstep_checksum(tick, checksum) -> bytes:
+    return _LOCKSTEP_CHECKSUM.pack(OP_LOCKSTEP_CHECKSUM, tick, checksum)
+
+
+def encode_lockstep_ready(seen, started=False) -> bytes:
+    return _LOCKSTEP_READY.pack(OP_LOCKSTEP_READY, (READY_SEEN if seen else 0) | (READY_STARTED if started else 0))
+
+
+def _decode_snapshot(payload):
+    _, seq, base_seq, node_count, added_count, removed_count = _SNAPSHOT.unpack_from(payload)
+    offset = _SNAPSHOT.size
+    nodes = []
+    for _ in range(node_count):
+        node_id, color, units = _SNAPSHOT_NODE.unpack_from(payload, offset)
+        nodes.append((node_id, COLORS[color], units))
+        offset += _SNAPSHOT_NODE.size
+    pairs = []
+    for _ in range(added_count + removed_count):
+        pairs.append(_SNAPSHOT_PAIR.unpack_from(payload, offset))
+        offset += _SNAPSHOT_PAIR.size
+    return {"action": "snapshot", "seq": seq, "base": base_seq, "nodes": nodes,
+            "added": pairs[:added_count], "removed": pairs[added_count:]}
+
+
+def decode(payload: bytes) -> dict:
+    # Zwraca słownik w stylu dawnych wiadomości JSON, np. {"action": "connect", "from": 0, "to": 3};
+    # każda uszkodzona lub ucięta wiadomość kończy się ValueError
+    try:
+        return _decode(payload)
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Niepoprawna wiadomość: {e}") from e
+
+
+def _decode(payload):
+    if not payload:
+        raise ValueError("Pusta wiadomość")
+    opcode = payload[0]
+    if opcode == OP_CONNECT:
+        _, from_id, to_id = _CONNECT.unpack(payload)
+        return {"action": "connect", "from": from_id, "to": to_id}
+    if opcode == OP_SNAPSHOT:
+        return _decode_snapshot(payload)
+    if opcode == OP_SNAPSHOT_ACK:
+        _, seq = _SNAPSHOT_ACK.unpack(payload)
+        return {"action": "snapshot_ack", "seq": seq}
+    if opcode == OP_LOCKSTEP_INPUT:
+        _, tick, ack, count = _LOCKSTEP_INPUT.unpack_from(payload)
+        moves = [_SNAPSHOT_PAIR.unpack_from(payload, _LOCKSTEP_INPUT.size + i * _SNAPSHOT_PAIR.size)
+                 for i in range(count)]
+        return {"action": "lockstep_input", "tick": tick, "ack": ack, "moves": moves}
+    if opcode == OP_LOCKSTEP_CHECKSUM:
+        _, tick, checksum = _LOCKSTEP_CHECKSUM.unpack(payload)
+        return {"action": "lockstep_checksum", "tick": tick, "checksum": checksum}
+    if opcode == OP_LOCKSTEP_READY:
+        _, flags = _LOCKSTEP_READY.unpack(payload)
+        return {"action": "lockstep_ready", "seen": bool(flags & READY_SEEN), "started": bool(flags & READY_STARTED)}
+    if opcode == OP_HELLO:
+        _, version = _HELLO.unpack(payload)
+        return {"action": "hello", "version": version}
+    if opcode == OP_JOIN:
+        return {"action": "join", "level": payload[1:].decode()}
+    if opcode == OP_MATCHED:
+        _, room_id, color = _MATCHED.unpack_from(payload)
+        return {"action": "matched", "room": room_id, "color": COLORS[color],
+                "level": payload[_MATCHED.size:].decode()}
+    if opcode == OP_GAME_OVER:
+        _, winner = _GAME_OVER.unpack(payload)
+        return {"action": "game_over", "winner": None if winner == NO_WINNER else COLORS[winner]}
+    if opcode == OP_OPPONENT_LEFT:
+        return {"action": "opponent_left"}
+    if opcode == OP_ERROR:
+        return {"action": "error", "message": payload[1:].decode()}
+    raise ValueError(f"Nieznany kod operacji: {opcode}")